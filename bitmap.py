@@ -17,8 +17,24 @@
         Since it's complete binary tree, the nodes can be stored in an array:
         [0,0,1,1,0,1,1,1,1,1,0,1] 
         
+    Follow up: use the bitmap as a block allocator (1 = allocated, 0 = free)
+    find_first_zero(), the first free leaf
+    find_free_run(length), the first run of length free leaves
+    alloc(order), allocate an aligned block of 2^order leaves
+    free(offset, order), release a block returned by alloc
 '''
 
+from array import array
+from operator import and_
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from threading import Barrier, Lock, Thread
+import time
+import zlib
+
 class BuddyBitmap:
     def __init__(self, size):
         """Initialize bitmap with given size (number of leaf nodes)"""
@@ -26,6 +42,21 @@ class BuddyBitmap:
         self.leaf_count = size
         self.total_nodes = 2 * size - 1
         self.bitmap = [0] * self.total_nodes
+        
+        # Free-run summary for the allocator. Subtrees of a complete tree
+        # with a non power of two leaf count don't cover contiguous offsets,
+        # so the summary lives in a separate tree padded to a power of two
+        # (node i has children 2i and 2i+1, leaves start at _capacity).
+        # Padding leaves count as allocated so they are never handed out.
+        # It is built on the first allocator call, plain bitmaps never pay for it.
+        capacity = 1
+        while capacity < size:
+            capacity *= 2
+        self._capacity = capacity
+        self._longest = None  # longest free run in subtree
+        self._prefix = None   # free run at the left edge
+        self._suffix = None   # free run at the right edge
+        self._block = None    # largest fully free aligned block
     
     def _get_parent(self, index):
         """Get parent index of current node"""
@@ -56,27 +87,815 @@ class BuddyBitmap:
         """Convert offset to leaf node index"""
         return offset + self.leaf_count - 1
     
+    def _update_range(self, lo, hi):
+        """Update all ancestors of nodes lo..hi, one tree level per pass
+        
+        The parents of a contiguous run of nodes are themselves a contiguous
+        run, so each pass rewrites every affected node exactly once and the
+        whole walk costs O(hi - lo + log n) instead of O((hi - lo) * log n).
+        """
+        bitmap = self.bitmap
+        while lo > 0:
+            lo = (lo - 1) // 2
+            hi = (hi - 1) // 2
+            if 2 * lo + 1 > hi:
+                # No node in the run is a parent of another one, recompute
+                # the whole level from its children in one slice assignment
+                bitmap[lo:hi + 1] = map(and_, bitmap[2 * lo + 1:2 * hi + 2:2],
+                                        bitmap[2 * lo + 2:2 * hi + 3:2])
+            else:
+                # Run straddles two depths (only near the top of a tree whose
+                # leaf count is not a power of two), go right to left so
+                # children are always recomputed before their parents
+                for parent in range(hi, lo - 1, -1):
+                    bitmap[parent] = bitmap[2 * parent + 1] & bitmap[2 * parent + 2]
+    
+    def _fill_range(self, offset, length, value):
+        """Set leaves offset..offset+length-1 to value and fix up ancestors"""
+        if offset < 0 or offset + length > self.leaf_count:
+            raise ValueError("Invalid offset or length")
+        if length <= 0:
+            return
+        
+        lo = self._get_leaf_index(offset)
+        hi = lo + length - 1
+        self.bitmap[lo:hi + 1] = [value] * length
+        self._update_range(lo, hi)
+        if self._longest is not None:
+            self._update_summary(offset, length, value)
+    
+    def _ensure_summary(self):
+        """Build the free-run summary from the current leaves if not built yet"""
+        if self._longest is not None:
+            return
+        zeros = bytes(2 * self._capacity * array('I').itemsize)
+        self._longest, self._prefix, self._suffix, self._block = (array('I', zeros) for _ in range(4))
+        self._update_summary(0, self.leaf_count, 0)
+        
+        # Apply every run of set leaves, found with bytes.find
+        leaves = bytes(self.bitmap[self._get_leaf_index(0):])
+        start = leaves.find(1)
+        while start >= 0:
+            end = leaves.find(0, start)
+            if end < 0:
+                end = len(leaves)
+            self._update_summary(start, end - start, 1)
+            start = leaves.find(1, end)
+    
+    def _merge_summary(self, node, span):
+        """Recompute the free-run summary of node from its two children"""
+        longest, prefix, suffix, block = self._longest, self._prefix, self._suffix, self._block
+        left, right = 2 * node, 2 * node + 1
+        half = span // 2
+        prefix[node] = half + prefix[right] if prefix[left] == half else prefix[left]
+        suffix[node] = half + suffix[left] if suffix[right] == half else suffix[right]
+        longest[node] = max(longest[left], longest[right], suffix[left] + prefix[right])
+        block[node] = span if longest[node] == span else max(block[left], block[right])
+    
+    def _update_summary(self, offset, length, value):
+        """Refresh the free-run summary after leaves offset..offset+length-1 became value
+        
+        Nodes whose whole span lies inside the range are uniform, so each level
+        is filled with one slice assignment and only the (at most two) nodes
+        straddling the range edges are merged from their children.
+        """
+        lo, hi = offset, offset + length
+        span, base = 1, self._capacity
+        while base:
+            first = -(-lo // span)
+            last = hi // span
+            if first < last:
+                fill = array('I', [0 if value else span]) * (last - first)
+                for summary in (self._longest, self._prefix, self._suffix, self._block):
+                    summary[base + first:base + last] = fill
+            if lo % span:
+                self._merge_summary(base + lo // span, span)
+            if hi % span and not (lo % span and (hi - 1) // span == lo // span):
+                self._merge_summary(base + (hi - 1) // span, span)
+            span *= 2
+            base //= 2
+    
+    def find_free_run(self, length):
+        """Find the first run of length free leaves
+        
+        Descends the free-run summary in O(log n) without scanning leaves.
+        
+        Args:
+            length: Number of consecutive free leaves needed
+            
+        Returns:
+            Offset of the first leaf of the run, or -1 if there is none
+        """
+        if length <= 0:
+            raise ValueError("Length must be positive")
+        self._ensure_summary()
+        longest, prefix, suffix = self._longest, self._prefix, self._suffix
+        if longest[1] < length:
+            return -1
+        
+        node, start, span = 1, 0, self._capacity
+        while node < self._capacity:
+            left, right = 2 * node, 2 * node + 1
+            span //= 2
+            if longest[left] >= length:
+                node = left
+            elif suffix[left] + prefix[right] >= length:
+                # Run crosses the midpoint of this node
+                return start + span - suffix[left]
+            else:
+                node = right
+                start += span
+        return start
+    
+    def find_first_zero(self):
+        """Find the first free leaf
+        
+        Returns:
+            Offset of the first leaf whose bit is 0, or -1 if all are set
+        """
+        return self.find_free_run(1)
+    
+    def alloc(self, order):
+        """Allocate a free block of 2^order leaves aligned to its size
+        
+        Args:
+            order: Block size as a power of two
+            
+        Returns:
+            Offset of the allocated block, or -1 if no aligned block of that order is free
+        """
+        if order < 0:
+            raise ValueError("Order must be non-negative")
+        size = 1 << order
+        self._ensure_summary()
+        block = self._block
+        if size > self._capacity or block[1] < size:
+            return -1
+        
+        node, start, span = 1, 0, self._capacity
+        while span > size:
+            span //= 2
+            if block[2 * node] >= size:
+                node = 2 * node
+            else:
+                node = 2 * node + 1
+                start += span
+        self.set_bit(start, size)
+        return start
+    
+    def free(self, offset, order):
+        """Free a block of 2^order leaves previously returned by alloc
+        
+        Args:
+            offset: Offset returned by alloc
+            order: Order the block was allocated with
+            
+        Raises:
+            ValueError: If the block is misaligned or not fully allocated
+        """
+        if order < 0:
+            raise ValueError("Order must be non-negative")
+        size = 1 << order
+        if offset % size:
+            raise ValueError(f"Offset {offset} is not aligned to order {order}")
+        if not self.all_set(offset, size):
+            raise ValueError(f"Block of order {order} at offset {offset} is not allocated")
+        self.clear_bit(offset, size)
+    
     def set_bit(self, offset, length):
         """Set bits from offset to offset+length-1"""
-        if offset < 0 or offset + length > self.leaf_count:
+        self._fill_range(offset, length, 1)
+    
+    def clear_bit(self, offset, length):
+        """Clear bits from offset to offset+length-1"""
+        self._fill_range(offset, length, 0)
+    
+    def count_set(self, offset, length):
+        """Count set bits from offset to offset+length-1"""
+        if offset < 0 or length < 0 or offset + length > self.leaf_count:
             raise ValueError("Invalid offset or length")
+        lo = self._get_leaf_index(offset)
+        return sum(self.bitmap[lo:lo + length])
+    
+    def all_set(self, offset, length):
+        """Check if every bit from offset to offset+length-1 is set"""
+        return self.count_set(offset, length) == length
+    
+    def any_set(self, offset, length):
+        """Check if any bit from offset to offset+length-1 is set"""
+        return self.count_set(offset, length) > 0
+    
+    @property
+    def is_full(self):
+        """Check if every leaf is set, i.e. the root is 1"""
+        return self.bitmap[0] == 1
+
+WORD_BITS = 64
+ALL_ONES = (1 << WORD_BITS) - 1
+
+# Lane masks for compacting the even bits of every 64-bit word into its low half
+_COMPACT_STEPS = [(shift, mask.to_bytes(8, 'little')) for shift, mask in (
+    (1, 0x3333333333333333),
+    (2, 0x0F0F0F0F0F0F0F0F),
+    (4, 0x00FF00FF00FF00FF),
+    (8, 0x0000FFFF0000FFFF),
+    (16, 0x00000000FFFFFFFF),
+)]
+_EVEN_BITS = (0x5555555555555555).to_bytes(8, 'little')
+
+def _words_to_int(words):
+    """Read an array('Q') as one little-endian integer"""
+    if sys.byteorder == 'big':
+        words = array('Q', words)
+        words.byteswap()
+    return int.from_bytes(words.tobytes(), 'little')
+
+def _bytes_to_words(data):
+    """Build an array('Q') from little-endian bytes"""
+    words = array('Q')
+    words.frombytes(data)
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
+
+class PackedBuddyBitmap:
+    """BuddyBitmap packed 64 nodes per word
+    
+    Every level of the complete tree is stored as its own array('Q'), so the
+    whole tree takes about 2 bits per leaf instead of two list slots. The
+    deepest level may be partial, in which case the leaves that don't fit
+    sit at the right end of the level above it. Parent words are derived
+    from child words with word-wide ANDs rather than one node at a time.
+    """
+    
+    def __init__(self, size):
+        """Initialize bitmap with given size (number of leaf nodes)"""
+        self.leaf_count = size
+        self.total_nodes = 2 * size - 1
+        self.depth = self.total_nodes.bit_length() - 1
         
-        # Set each leaf node in the range
-        for i in range(length):
-            leaf_idx = self._get_leaf_index(offset + i)
-            self.bitmap[leaf_idx] = 1
-            self._update_parent(leaf_idx)
+        # Leaves at the tail of level depth-1 when the deepest level is partial
+        self._shallow_leaves = (1 << self.depth) - size
+        self._level_bits = [1 << d for d in range(self.depth)]
+        self._level_bits.append(size - self._shallow_leaves)
+        self._levels = self._allocate_levels()
+    
+    def _allocate_levels(self):
+        """Allocate the zeroed word storage of every level"""
+        return [array('Q', [0]) * (-(-bits // WORD_BITS)) for bits in self._level_bits]
+    
+    @property
+    def bitmap(self):
+        """The tree in the same array layout as BuddyBitmap.bitmap"""
+        nodes = []
+        for words, bits in zip(self._levels, self._level_bits):
+            value = _words_to_int(words)
+            nodes.extend(map(int, format(value, f'0{len(words) * WORD_BITS}b')[::-1][:bits]))
+        return nodes
+    
+    def _leaf_segments(self, offset, length):
+        """Split a leaf range into (level, start, end) position runs"""
+        if offset < 0 or length < 0 or offset + length > self.leaf_count:
+            raise ValueError("Invalid offset or length")
+        lo, hi = offset, offset + length
+        shallow = self._shallow_leaves
+        segments = []
+        if lo < shallow:
+            base = self._level_bits[self.depth - 1] - shallow
+            segments.append((self.depth - 1, base + lo, base + min(hi, shallow)))
+        if hi > shallow:
+            segments.append((self.depth, max(lo, shallow) - shallow, hi - shallow))
+        return [segment for segment in segments if segment[1] < segment[2]]
+    
+    def _fill_bits(self, level, start, end, value):
+        """Set positions start..end-1 of a level to value"""
+        words = self._levels[level]
+        first, last = start // WORD_BITS, (end - 1) // WORD_BITS
+        head = (ALL_ONES << (start % WORD_BITS)) & ALL_ONES
+        tail = ALL_ONES >> (WORD_BITS - 1 - (end - 1) % WORD_BITS)
+        if first == last:
+            head &= tail
+        words[first] = words[first] | head if value else words[first] & ~head
+        if first != last:
+            words[last] = words[last] | tail if value else words[last] & ~tail
+            if last - first > 1:
+                words[first + 1:last] = array('Q', [ALL_ONES if value else 0]) * (last - first - 1)
+    
+    def _derive_words(self, level, first, last):
+        """Recompute words first..last of a level from the level below
+        
+        Each pair of child bits is ANDed in place, then the even bits of
+        every 64-bit lane are compacted into its low half and the halves are
+        gathered, all on one big integer so the work stays out of bytecode.
+        """
+        count = 2 * (last - first + 1)
+        # Words past the end of the child level read as zero
+        x = _words_to_int(self._levels[level + 1][2 * first:2 * last + 2])
+        x &= (x >> 1) & int.from_bytes(_EVEN_BITS * count, 'little')
+        for shift, mask in _COMPACT_STEPS:
+            x = (x | x >> shift) & int.from_bytes(mask * count, 'little')
+        halves = memoryview(x.to_bytes(count * 8, 'little')).cast('I')[::2]
+        derived = _bytes_to_words(halves.tobytes())
+        
+        words = self._levels[level]
+        if level == self.depth - 1 and self._shallow_leaves:
+            # Keep the leaves that live at the end of this level
+            leaf_start = self._level_bits[level] - self._shallow_leaves
+            end_word = min(last, (self._level_bits[level] - 1) // WORD_BITS)
+            for i in range(max(first, leaf_start // WORD_BITS), end_word + 1):
+                keep = ALL_ONES << max(leaf_start - i * WORD_BITS, 0) & ALL_ONES
+                derived[i - first] = derived[i - first] & ~keep | words[i] & keep
+        words[first:last + 1] = derived
+    
+    def _update_ancestors(self, level, start, end):
+        """Update every ancestor of positions start..end-1 of a level"""
+        while level > 0:
+            level -= 1
+            start //= 2
+            end = (end - 1) // 2 + 1
+            self._derive_words(level, start // WORD_BITS, (end - 1) // WORD_BITS)
+    
+    def _fill_range(self, offset, length, value):
+        """Set leaves offset..offset+length-1 to value and fix up ancestors"""
+        for level, start, end in self._leaf_segments(offset, length):
+            self._fill_bits(level, start, end, value)
+            self._update_ancestors(level, start, end)
+    
+    def set_bit(self, offset, length):
+        """Set bits from offset to offset+length-1"""
+        self._fill_range(offset, length, 1)
     
     def clear_bit(self, offset, length):
         """Clear bits from offset to offset+length-1"""
-        if offset < 0 or offset + length > self.leaf_count:
+        self._fill_range(offset, length, 0)
+    
+    def count_set(self, offset, length):
+        """Count set bits from offset to offset+length-1 with one popcount per level run"""
+        total = 0
+        for level, start, end in self._leaf_segments(offset, length):
+            first = start // WORD_BITS
+            words = self._levels[level][first:(end - 1) // WORD_BITS + 1]
+            value = _words_to_int(words) >> (start - first * WORD_BITS)
+            total += (value & ((1 << (end - start)) - 1)).bit_count()
+        return total
+    
+    def all_set(self, offset, length):
+        """Check if every bit from offset to offset+length-1 is set"""
+        return self.count_set(offset, length) == length
+    
+    def any_set(self, offset, length):
+        """Check if any bit from offset to offset+length-1 is set"""
+        return self.count_set(offset, length) > 0
+    
+    @property
+    def is_full(self):
+        """Check if every leaf is set, i.e. the root is 1"""
+        return self._levels[0][0] & 1 == 1
+
+PAGE_SIZE = 4096
+
+# magic, version, leaf_count, checkpoint sequence number, crc32 of the rest
+_HEADER = struct.Struct('<8sIQQI')
+# sequence number, value (1 = set_bit, 0 = clear_bit), offset, length, crc32 of the rest
+_JOURNAL_RECORD = struct.Struct('<QBQQI')
+
+class PersistentBuddyBitmap(PackedBuddyBitmap):
+    """PackedBuddyBitmap stored in a memory-mapped file with a write-ahead journal
+    
+    The file holds a one page header followed by the packed levels. It is
+    mapped copy-on-write, so opening costs nothing up front and pages are
+    faulted in as they are touched, while changes never reach the file
+    behind the journal's back. Every set_bit/clear_bit range is appended to
+    path + '.journal' and fsynced in groups of group_commit records (or on
+    sync()). A checkpoint writes the dirty pages back, records the last
+    journaled sequence number in the header and truncates the journal, so
+    reopening only replays the journal tail written since then.
+    
+    Range fills are idempotent, which makes replaying a record whose effect
+    already reached the file (e.g. a crash in the middle of a checkpoint)
+    harmless.
+    """
+    
+    MAGIC = b'BUDDYBMP'
+    VERSION = 1
+    
+    def __init__(self, path, size=None, group_commit=256, checkpoint_bytes=64 << 20):
+        """Open the bitmap stored at path, creating it if it doesn't exist
+        
+        Args:
+            path: Bitmap file, the journal lives next to it
+            size: Number of leaf nodes, required when creating the file
+            group_commit: Number of journal records written per fsync
+            checkpoint_bytes: Journal size that triggers a checkpoint
+        """
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.group_commit = group_commit
+        self.checkpoint_bytes = checkpoint_bytes
+        self._pending = bytearray()
+        self._pending_records = 0
+        self._dirty_pages = set()
+        
+        self._created = not os.path.exists(path)
+        if self._created:
+            if size is None:
+                raise ValueError("Size is required to create a new bitmap file")
+            self._checkpoint_seq = 0
+        else:
+            with open(path, 'rb') as f:
+                leaf_count, self._checkpoint_seq = self._parse_header(f.read(_HEADER.size))
+            if size is not None and size != leaf_count:
+                raise ValueError(f"Bitmap file has {leaf_count} leaves, not {size}")
+            size = leaf_count
+        super().__init__(size)
+        
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | (os.O_TRUNC if self._created else 0)
+        self._journal_fd = os.open(self.journal_path, flags, 0o644)
+        self._seq = self._checkpoint_seq
+        self._replay_journal()
+    
+    def _parse_header(self, header):
+        """Validate the file header and return (leaf_count, checkpoint_seq)"""
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{self.path} is too short to be a bitmap file")
+        magic, version, leaf_count, checkpoint_seq, crc = _HEADER.unpack(header)
+        if magic != self.MAGIC or crc != zlib.crc32(header[:-4]):
+            raise ValueError(f"{self.path} is not a valid bitmap file")
+        if version != self.VERSION:
+            raise ValueError(f"Unsupported bitmap file version {version}")
+        return leaf_count, checkpoint_seq
+    
+    def _write_header(self):
+        """Write the header with the current checkpoint sequence number"""
+        header = _HEADER.pack(self.MAGIC, self.VERSION, self.leaf_count, self._checkpoint_seq, 0)
+        os.pwrite(self._fd, header[:-4] + struct.pack('<I', zlib.crc32(header[:-4])), 0)
+    
+    def _allocate_levels(self):
+        """Map every level onto its slice of the bitmap file"""
+        offsets = []
+        file_size = PAGE_SIZE
+        for bits in self._level_bits:
+            offsets.append(file_size)
+            file_size += -(-bits // WORD_BITS) * 8
+        
+        if self._created:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            os.ftruncate(self._fd, file_size)
+            self._write_header()
+            os.fsync(self._fd)
+        else:
+            self._fd = os.open(self.path, os.O_RDWR)
+            if os.fstat(self._fd).st_size != file_size:
+                os.close(self._fd)
+                raise ValueError(f"{self.path} does not match its {self.leaf_count} leaf header")
+        
+        self._mmap = mmap.mmap(self._fd, file_size, access=mmap.ACCESS_COPY)
+        self._level_offsets = offsets
+        view = memoryview(self._mmap)
+        return [view[start:start + -(-bits // WORD_BITS) * 8].cast('Q')
+                for start, bits in zip(offsets, self._level_bits)]
+    
+    def _mark_dirty(self, level, first, last):
+        """Remember the pages holding words first..last of a level"""
+        start = self._level_offsets[level] + first * 8
+        end = self._level_offsets[level] + last * 8 + 7
+        self._dirty_pages.update(range(start // PAGE_SIZE, end // PAGE_SIZE + 1))
+    
+    def _fill_bits(self, level, start, end, value):
+        super()._fill_bits(level, start, end, value)
+        self._mark_dirty(level, start // WORD_BITS, (end - 1) // WORD_BITS)
+    
+    def _derive_words(self, level, first, last):
+        super()._derive_words(level, first, last)
+        self._mark_dirty(level, first, last)
+    
+    def _replay_journal(self):
+        """Apply the journal records written after the last checkpoint
+        
+        Stops at the first torn or corrupt record and cuts the journal
+        there, since nothing after it was ever acknowledged by sync().
+        """
+        with open(self.journal_path, 'rb') as f:
+            data = f.read()
+        
+        valid = 0
+        for pos in range(0, len(data) - _JOURNAL_RECORD.size + 1, _JOURNAL_RECORD.size):
+            record = data[pos:pos + _JOURNAL_RECORD.size]
+            seq, value, offset, length, crc = _JOURNAL_RECORD.unpack(record)
+            if crc != zlib.crc32(record[:-4]) or seq > self._checkpoint_seq and seq != self._seq + 1:
+                break
+            if seq > self._checkpoint_seq:
+                PackedBuddyBitmap._fill_range(self, offset, length, value)
+                self._seq = seq
+            valid = pos + _JOURNAL_RECORD.size
+        
+        if valid != len(data):
+            os.ftruncate(self._journal_fd, valid)
+            os.fsync(self._journal_fd)
+        self._journal_size = valid
+    
+    def _fill_range(self, offset, length, value):
+        """Journal the range, then apply it to the mapped tree"""
+        self._leaf_segments(offset, length)  # Validate before journaling
+        self._seq += 1
+        record = _JOURNAL_RECORD.pack(self._seq, value, offset, length, 0)
+        self._pending += record[:-4] + struct.pack('<I', zlib.crc32(record[:-4]))
+        self._pending_records += 1
+        super()._fill_range(offset, length, value)
+        
+        if self._pending_records >= self.group_commit:
+            self.sync()
+            if self._journal_size >= self.checkpoint_bytes:
+                self.checkpoint()
+    
+    def sync(self):
+        """Write and fsync every pending journal record"""
+        if self._pending:
+            os.write(self._journal_fd, self._pending)
+            os.fsync(self._journal_fd)
+            self._journal_size += len(self._pending)
+            self._pending.clear()
+            self._pending_records = 0
+    
+    def checkpoint(self):
+        """Write dirty pages back to the bitmap file and empty the journal"""
+        self.sync()
+        pages = sorted(self._dirty_pages)
+        i = 0
+        while i < len(pages):
+            # Coalesce runs of adjacent pages into one write
+            j = i
+            while j + 1 < len(pages) and pages[j + 1] == pages[j] + 1:
+                j += 1
+            start, end = pages[i] * PAGE_SIZE, (pages[j] + 1) * PAGE_SIZE
+            os.pwrite(self._fd, self._mmap[start:end], start)
+            i = j + 1
+        os.fsync(self._fd)
+        
+        self._checkpoint_seq = self._seq
+        self._write_header()
+        os.fsync(self._fd)
+        os.ftruncate(self._journal_fd, 0)
+        os.fsync(self._journal_fd)
+        self._journal_size = 0
+        self._dirty_pages.clear()
+    
+    def close(self):
+        """Checkpoint and release the mapping and file descriptors"""
+        if self._mmap.closed:
+            return
+        self.checkpoint()
+        for words in self._levels:
+            words.release()
+        self._levels = []
+        self._mmap.close()
+        os.close(self._fd)
+        os.close(self._journal_fd)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class ConcurrentBuddyBitmap:
+    """Thread-safe BuddyBitmap split into independently locked subtrees
+    
+    Leaves are divided into shards of shard_leaves consecutive offsets, each
+    a bitmap of its own behind its own lock, so threads working on disjoint
+    ranges don't contend. The levels above the shards form a small top tree
+    whose leaves are the shard roots; it is the only shared state and its
+    lock is taken only when a shard's root actually flips. A shard lock is
+    always acquired before the top lock, never the other way round, and
+    never while another shard lock is held.
+    
+    Operations spanning several shards are applied shard by shard, so other
+    threads may observe them half done, but every leaf ends up exactly as
+    if the operations had run one after another.
+    """
+    
+    def __init__(self, size, shard_leaves=1 << 16, backend=BuddyBitmap):
+        """Initialize bitmap with given size (number of leaf nodes)
+        
+        Args:
+            size: Number of leaf nodes
+            shard_leaves: Number of leaves per independently locked subtree
+            backend: Bitmap class used for each shard
+        """
+        self.leaf_count = size
+        self.shard_leaves = shard_leaves
+        self._shards = [backend(min(shard_leaves, size - start))
+                        for start in range(0, size, shard_leaves)]
+        self._shard_locks = [Lock() for _ in self._shards]
+        self._top = BuddyBitmap(len(self._shards))
+        self._top_lock = Lock()
+    
+    def _split(self, offset, length):
+        """Split a leaf range into (shard, local_offset, local_length) pieces"""
+        if offset < 0 or length < 0 or offset + length > self.leaf_count:
             raise ValueError("Invalid offset or length")
+        end = offset + length
+        while offset < end:
+            shard, local_offset = divmod(offset, self.shard_leaves)
+            local_length = min(self.shard_leaves - local_offset, end - offset)
+            yield shard, local_offset, local_length
+            offset += local_length
+    
+    def _apply_to_shard(self, shard, pieces):
+        """Apply (value, local_offset, local_length) pieces to one shard under its lock"""
+        bitmap = self._shards[shard]
+        with self._shard_locks[shard]:
+            for value, local_offset, local_length in pieces:
+                if value:
+                    bitmap.set_bit(local_offset, local_length)
+                else:
+                    bitmap.clear_bit(local_offset, local_length)
+            
+            # Only this shard's lock holder writes its top leaf, so it can be
+            # read without the top lock and the top walk skipped when unchanged
+            full = bitmap.is_full
+            if full != (self._top.bitmap[self._top._get_leaf_index(shard)] == 1):
+                with self._top_lock:
+                    if full:
+                        self._top.set_bit(shard, 1)
+                    else:
+                        self._top.clear_bit(shard, 1)
+    
+    def set_bit(self, offset, length):
+        """Set bits from offset to offset+length-1"""
+        for shard, local_offset, local_length in list(self._split(offset, length)):
+            self._apply_to_shard(shard, [(1, local_offset, local_length)])
+    
+    def clear_bit(self, offset, length):
+        """Clear bits from offset to offset+length-1"""
+        for shard, local_offset, local_length in list(self._split(offset, length)):
+            self._apply_to_shard(shard, [(0, local_offset, local_length)])
+    
+    def apply(self, ops):
+        """Apply a batch of operations, taking each shard lock once
         
-        # Clear each leaf node in the range
+        Args:
+            ops: Iterable of (op, offset, length) where op is "set_bit" or
+                "clear_bit". Operations on the same shard keep their order.
+        """
+        by_shard = {}
+        for op, offset, length in ops:
+            if op not in ("set_bit", "clear_bit"):
+                raise ValueError(f"Unknown operation {op!r}")
+            value = 1 if op == "set_bit" else 0
+            for shard, local_offset, local_length in self._split(offset, length):
+                by_shard.setdefault(shard, []).append((value, local_offset, local_length))
+        for shard in sorted(by_shard):
+            self._apply_to_shard(shard, by_shard[shard])
+    
+    def count_set(self, offset, length):
+        """Count set bits from offset to offset+length-1"""
+        total = 0
+        for shard, local_offset, local_length in list(self._split(offset, length)):
+            with self._shard_locks[shard]:
+                total += self._shards[shard].count_set(local_offset, local_length)
+        return total
+    
+    def all_set(self, offset, length):
+        """Check if every bit from offset to offset+length-1 is set"""
+        return self.count_set(offset, length) == length
+    
+    def any_set(self, offset, length):
+        """Check if any bit from offset to offset+length-1 is set"""
+        return self.count_set(offset, length) > 0
+    
+    @property
+    def is_full(self):
+        """Check if every leaf is set"""
+        with self._top_lock:
+            return self._top.is_full
+    
+    @property
+    def bitmap(self):
+        """Consistent snapshot in the same array layout as BuddyBitmap.bitmap"""
+        for lock in self._shard_locks:
+            lock.acquire()
+        try:
+            leaves = []
+            for shard in self._shards:
+                leaves.extend(shard.bitmap[shard.leaf_count - 1:])
+        finally:
+            for lock in self._shard_locks:
+                lock.release()
+        
+        snapshot = BuddyBitmap(self.leaf_count)
+        first_leaf = snapshot._get_leaf_index(0)
+        snapshot.bitmap[first_leaf:] = leaves
+        snapshot._update_range(first_leaf, snapshot.total_nodes - 1)
+        return snapshot.bitmap
+
+def benchmark(leaf_count=1 << 20, length=1 << 16, rounds=5):
+    """Compare range set/clear against walking to the root once per leaf
+    
+    Args:
+        leaf_count: Number of leaves in the bitmap
+        length: Number of leaves touched by each range operation
+        rounds: Number of set/clear pairs to time for each approach
+        
+    Returns:
+        Tuple of (per_leaf_seconds, range_seconds) per set/clear pair
+    """
+    bitmap = BuddyBitmap(leaf_count)
+    offset = (leaf_count - length) // 2
+    
+    def per_leaf(value):
         for i in range(length):
-            leaf_idx = self._get_leaf_index(offset + i)
-            self.bitmap[leaf_idx] = 0
-            self._update_parent(leaf_idx)
+            leaf_idx = bitmap._get_leaf_index(offset + i)
+            bitmap.bitmap[leaf_idx] = value
+            bitmap._update_parent(leaf_idx)
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        per_leaf(1)
+        per_leaf(0)
+    per_leaf_seconds = (time.perf_counter() - start) / rounds
+    
+    start = time.perf_counter()
+    for _ in range(rounds):
+        bitmap.set_bit(offset, length)
+        bitmap.clear_bit(offset, length)
+    range_seconds = (time.perf_counter() - start) / rounds
+    
+    return per_leaf_seconds, range_seconds
+
+def benchmark_persistent(leaf_count=1 << 20, ops=100000, length=64):
+    """Compare random set/clear throughput of the in-memory and persistent packed bitmaps
+    
+    Returns:
+        Tuple of (in_memory_ops_per_second, persistent_ops_per_second)
+    """
+    offsets = [(i * 2654435761) % (leaf_count - length) for i in range(ops)]
+    
+    def run(bitmap):
+        start = time.perf_counter()
+        for i, offset in enumerate(offsets):
+            if i & 1:
+                bitmap.clear_bit(offset, length)
+            else:
+                bitmap.set_bit(offset, length)
+        return ops / (time.perf_counter() - start)
+    
+    in_memory = run(PackedBuddyBitmap(leaf_count))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with PersistentBuddyBitmap(os.path.join(tmpdir, 'bitmap'), leaf_count) as bitmap:
+            persistent = run(bitmap)
+    return in_memory, persistent
+
+def benchmark_concurrent(thread_counts=(1, 2, 4, 8), ops_per_thread=20000,
+                         leaf_count=1 << 20, length=64, batch=64):
+    """Compare multi-thread throughput of one global mutex against subtree locking
+    
+    Every thread works on its own disjoint slice of the bitmap. Note that on
+    a CPython build with the GIL only the free-threaded build lets the
+    sharded variant scale with cores, the GIL build mostly shows the lower
+    locking overhead.
+    
+    Returns:
+        Dict mapping thread count to (global_lock, sharded, sharded_batched) ops/s
+    """
+    def run(threads, bitmap, lock=None, batched=False):
+        region = leaf_count // threads
+        barrier = Barrier(threads + 1)
+        
+        def worker(index):
+            base = index * region
+            offsets = [base + (i * 2654435761) % (region - length) for i in range(ops_per_thread)]
+            ops = [("set_bit" if i & 1 else "clear_bit", offset, length)
+                   for i, offset in enumerate(offsets)]
+            barrier.wait()
+            if batched:
+                for i in range(0, len(ops), batch):
+                    bitmap.apply(ops[i:i + batch])
+            elif lock is not None:
+                for op, offset, length_ in ops:
+                    with lock:
+                        getattr(bitmap, op)(offset, length_)
+            else:
+                for op, offset, length_ in ops:
+                    getattr(bitmap, op)(offset, length_)
+        
+        workers = [Thread(target=worker, args=(i,)) for i in range(threads)]
+        for t in workers:
+            t.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for t in workers:
+            t.join()
+        return threads * ops_per_thread / (time.perf_counter() - start)
+    
+    results = {}
+    for threads in thread_counts:
+        results[threads] = (
+            run(threads, BuddyBitmap(leaf_count), lock=Lock()),
+            run(threads, ConcurrentBuddyBitmap(leaf_count)),
+            run(threads, ConcurrentBuddyBitmap(leaf_count), batched=True),
+        )
+    return results
 
 # Example usage
 if __name__ == "__main__":
@@ -88,4 +907,32 @@ if __name__ == "__main__":
     bitmap.set_bit(4, 1)  # Set fifth leaf node to 1
     bitmap.set_bit(5, 2)  # Set sixth and seventh leaf nodes to 1
     
-    print("Bitmap array:", bitmap.bitmap)
\ No newline at end of file
+    print("Bitmap array:", bitmap.bitmap)
+    print("First free leaf:", bitmap.find_first_zero())
+    
+    # Same tree packed 64 nodes per word
+    packed = PackedBuddyBitmap(7)
+    packed.set_bit(0, 2)
+    packed.set_bit(4, 3)
+    print("Packed bitmap array:", packed.bitmap)
+    print("Set bits in [0, 7):", packed.count_set(0, 7), "all set in [4, 7):", packed.all_set(4, 3))
+    
+    # Use a bitmap as a buddy allocator
+    allocator = BuddyBitmap(16)
+    a = allocator.alloc(2)
+    b = allocator.alloc(0)
+    c = allocator.alloc(2)
+    print("Allocated blocks at:", a, b, c)
+    allocator.free(a, 2)
+    print("First run of 3 free leaves:", allocator.find_free_run(3))
+    print("Block of order 4 while fragmented:", allocator.alloc(4))
+    
+    if "--bench" in sys.argv:
+        per_leaf_seconds, range_seconds = benchmark()
+        print(f"1M leaves, 64K-leaf range: per-leaf {per_leaf_seconds * 1000:.1f} ms, "
+              f"range {range_seconds * 1000:.1f} ms ({per_leaf_seconds / range_seconds:.0f}x)")
+        in_memory, persistent = benchmark_persistent()
+        print(f"Packed in-memory {in_memory:.0f} ops/s, persistent {persistent:.0f} ops/s")
+        for threads, (global_lock, sharded, batched) in benchmark_concurrent().items():
+            print(f"{threads} threads: global lock {global_lock:.0f} ops/s, "
+                  f"sharded {sharded:.0f} ops/s, batched {batched:.0f} ops/s")
\ No newline at end of file
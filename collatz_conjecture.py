@@ -9,6 +9,14 @@ N will eventually be 1.
 Given N, how many steps does it take to reach 1?
 """
 
+from array import array
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import os
+import sys
+import time
+
 def collatz_steps(n, memo=None):
     """
     Calculate the number of steps needed to reach 1 using the Collatz conjecture.
@@ -39,21 +47,282 @@ def collatz_steps(n, memo=None):
     if n in memo:
         return memo[n]
     
-    # Calculate next number based on whether n is even or odd
-    if n % 2 == 0:
-        steps = 1 + collatz_steps(n // 2, memo)
-    else:
-        steps = 1 + collatz_steps(3 * n + 1, memo)
+    # Walk the trajectory until reaching 1 or a memoized number
+    path = []
+    while n != 1 and n not in memo:
+        path.append(n)
+        # Calculate next number based on whether n is even or odd
+        if n % 2 == 0:
+            n = n // 2
+        else:
+            n = 3 * n + 1
+    steps = 0 if n == 1 else memo[n]
     
-    # Store result in memo before returning
-    memo[n] = steps
+    # Store results in memo on the way back
+    for m in reversed(path):
+        steps += 1
+        memo[m] = steps
     return steps
 
-# Example usage
-test_numbers = [5, 13, 19, 27]
-for num in test_numbers:
+class CollatzEngine:
+    def __init__(self, table_limit=1 << 20, lru_size=100000):
+        """
+        Collatz step counter with a cache that persists across calls.
+        
+        Step counts of n below table_limit are kept in a 2-byte array,
+        larger n in an LRU of at most lru_size entries, so memory stays
+        bounded no matter how many numbers are asked for.
+        
+        Args:
+            table_limit (int): Numbers below this are cached in the table
+            lru_size (int): Maximum number of larger numbers cached
+        """
+        self.table_limit = table_limit
+        self.lru_size = lru_size
+        self.table = array('H', bytes(2 * table_limit))  # 0 means not computed yet
+        self.lru = OrderedDict()
+    
+    def _cached(self, n):
+        """Cached step count of n > 1, or None"""
+        if n < self.table_limit:
+            return self.table[n] or None
+        steps = self.lru.get(n)
+        if steps is not None:
+            self.lru.move_to_end(n)
+        return steps
+    
+    def _store(self, n, steps):
+        if n < self.table_limit:
+            self.table[n] = steps
+        else:
+            self.lru[n] = steps
+            if len(self.lru) > self.lru_size:
+                self.lru.popitem(last=False)
+    
+    def steps(self, n):
+        """
+        Calculate the number of steps needed to reach 1, iteratively.
+        
+        Raises:
+            ValueError: If n is not a positive integer
+        """
+        if not isinstance(n, int) or n <= 0:
+            raise ValueError("Input must be a positive integer")
+        
+        path = []
+        steps = 0
+        while n != 1:
+            cached = self._cached(n)
+            if cached is not None:
+                steps = cached
+                break
+            path.append(n)
+            n = n // 2 if n % 2 == 0 else 3 * n + 1
+        
+        for m in reversed(path):
+            steps += 1
+            self._store(m, steps)
+        return steps
+    
+    def steps_range(self, lo, hi):
+        """
+        Calculate the step counts of every number in [lo, hi) in one pass.
+        
+        Numbers are handled in increasing order and each trajectory is only
+        followed until it drops below its start, where the count is already
+        known from this range or the cache.
+        
+        Returns:
+            array: array('H') whose item i is the step count of lo + i
+        """
+        if not isinstance(lo, int) or lo <= 0:
+            raise ValueError("Input must be a positive integer")
+        result = array('H', bytes(2 * max(0, hi - lo)))
+        table, table_limit = self.table, self.table_limit
+        
+        start = lo
+        if lo == 1 and hi > 1:
+            start = 2  # result[0] = 0 already
+        for n in range(start, hi):
+            x = n
+            count = 0
+            while x >= n:
+                if x & 1:
+                    x = (3 * x + 1) >> 1  # 3x + 1 is even, do both steps at once
+                    count += 2
+                else:
+                    x >>= 1
+                    count += 1
+            if x >= lo:
+                count += result[x - lo]
+            elif x < table_limit and table[x]:
+                count += table[x]
+            elif x > 1:
+                count += self.steps(x)
+            result[n - lo] = count
+            if n < table_limit:
+                table[n] = count
+        return result
+
+def build_jump_table(k):
+    """
+    Precompute k steps of T(n) = n/2 (even n) or (3n+1)/2 (odd n) at once.
+    
+    For n = a * 2**k + r, applying T k times gives 3**odd[r] * a + offset[r],
+    where odd[r] is how many of those steps were odd. Each odd step of T
+    stands for two steps of the original sequence, so the jump covers
+    k + odd[r] of them. Valid for n >= 2**k, which can't reach 1 early.
+    
+    Args:
+        k (int): Number of steps of T per jump
+        
+    Returns:
+        tuple: (odd, offset) arrays indexed by the residue r
+    """
+    size = 1 << k
+    odd = array('B', bytes(size))
+    offset = array('Q', bytes(8 * size))
+    for r in range(size):
+        # The a * 3**c * 2**(k-j) term stays even until the last step, so
+        # the parity of each step only depends on the residue part
+        x = r
+        c = 0
+        for _ in range(k):
+            if x & 1:
+                x = (3 * x + 1) >> 1
+                c += 1
+            else:
+                x >>= 1
+        odd[r] = c
+        offset[r] = x
+    return odd, offset
+
+# Shared state of a sweep worker process, set by _sweep_init
+_sweep_state = None
+
+def _sweep_init(name, table_size, k, odd, offset):
+    """Attach to the shared step table and unpack the jump table."""
+    global _sweep_state
+    shm = SharedMemory(name=name)
+    table = shm.buf[:2 * table_size].cast('H')
+    # Lists hand out their ints without boxing them again on every access
+    multipliers = [3 ** c for c in odd]
+    steps = [k + c for c in odd]
+    _sweep_state = (shm, table, table_size, k, (1 << k) - 1, multipliers, offset.tolist(), steps)
+
+def _sweep_shard(lo, hi):
+    """Step counts of [lo, hi) reduced to (max, argmax, histogram)."""
+    _, table, table_size, k, mask, multipliers, offsets, steps = _sweep_state
+    counts = array('H', bytes(2 * (hi - lo)))
+    for n in range(lo, hi):
+        x = n
+        count = 0
+        while x >= table_size:
+            r = x & mask
+            x = multipliers[r] * (x >> k) + offsets[r]
+            count += steps[r]
+            if lo <= x < n:
+                # Dropped below the start into this shard, already counted
+                count += counts[x - lo]
+                break
+        else:
+            count += table[x]
+        counts[n - lo] = count
+    best = max(counts)
+    return best, lo + counts.index(best), Counter(counts)
+
+def sweep(lo, hi, workers=None, table_size=1 << 20, k=16, shard_size=1 << 18):
+    """
+    Sweep the step counts of every number in [lo, hi) across processes.
+    
+    A table of step counts below table_size is computed once and shared
+    read-only with the workers through shared memory. Workers follow each
+    trajectory k steps at a time with the jump table of build_jump_table
+    until it lands in the table or below its start within the same shard.
+    
+    Args:
+        lo (int): First number, at least 1
+        hi (int): End of the range, exclusive
+        workers (int): Number of worker processes, all CPUs when None
+        table_size (int): Size of the shared table, raised to 2**k if smaller
+        k (int): Steps per jump, the jump table has 2**k entries
+        shard_size (int): Numbers per task sent to a worker
+        
+    Returns:
+        dict: count, max_steps, argmax (smallest number with max_steps) and
+            histogram (step count -> how many numbers take that many steps)
+    """
+    if not isinstance(lo, int) or lo <= 0:
+        raise ValueError("Input must be a positive integer")
+    table_size = max(table_size, 1 << k)
+    odd, offset = build_jump_table(k)
+    
+    shm = SharedMemory(create=True, size=2 * table_size)
     try:
-        steps = collatz_steps(num)
-        print(f"Number {num} takes {steps} steps to reach 1")
-    except ValueError as e:
-        print(f"Error: {e}")
\ No newline at end of file
+        table = shm.buf.cast('H')
+        table[0] = 0
+        table[1:] = CollatzEngine(table_limit=0).steps_range(1, table_size)
+        table.release()
+        
+        max_steps, argmax, histogram = -1, None, Counter()
+        shards = [(start, min(start + shard_size, hi)) for start in range(lo, hi, shard_size)]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_sweep_init,
+                                 initargs=(shm.name, table_size, k, odd, offset)) as pool:
+            futures = [pool.submit(_sweep_shard, start, end) for start, end in shards]
+            for future in futures:
+                best, best_n, shard_histogram = future.result()
+                # Shards come back in order, so ties keep the smallest number
+                if best > max_steps:
+                    max_steps, argmax = best, best_n
+                histogram.update(shard_histogram)
+    finally:
+        shm.close()
+        shm.unlink()
+    
+    return {
+        "count": max(0, hi - lo),
+        "max_steps": max_steps if argmax is not None else None,
+        "argmax": argmax,
+        "histogram": dict(sorted(histogram.items())),
+    }
+
+def benchmark_sweep(hi=1 << 23, worker_counts=None):
+    """
+    Time sweep(1, hi) with different numbers of worker processes.
+    
+    Returns:
+        dict: worker count -> numbers per second
+    """
+    if worker_counts is None:
+        worker_counts = sorted({1, 2, 4, 8, 16, os.cpu_count()} & set(range(1, os.cpu_count() + 1)))
+    results = {}
+    for workers in worker_counts:
+        start = time.perf_counter()
+        sweep(1, hi, workers=workers)
+        results[workers] = (hi - 1) / (time.perf_counter() - start)
+    return results
+
+# Example usage
+if __name__ == "__main__":
+    test_numbers = [5, 13, 19, 27]
+    for num in test_numbers:
+        try:
+            steps = collatz_steps(num)
+            print(f"Number {num} takes {steps} steps to reach 1")
+        except ValueError as e:
+            print(f"Error: {e}")
+    
+    engine = CollatzEngine()
+    counts = engine.steps_range(1, 1000000)
+    longest = max(range(len(counts)), key=counts.__getitem__)
+    print(f"Below 1000000, {longest + 1} takes the most steps: {counts[longest]}")
+    print(f"Number 2**100 + 1 takes {engine.steps(2 ** 100 + 1)} steps to reach 1")
+    
+    stats = sweep(1, 10000000)
+    print(f"Below 10000000, {stats['argmax']} takes the most steps: {stats['max_steps']}")
+    
+    if "--bench" in sys.argv:
+        results = benchmark_sweep()
+        for workers, per_second in results.items():
+            print(f"{workers} workers: {per_second / 1e6:.2f}M numbers/s "
+                  f"({per_second / results[min(results)]:.1f}x)")
@@ -42,4 +42,255 @@ Let me explain the synchronization scenario and address the key concepts:
 - Only one thread can hold the mutex at a time
 - In this case, protects the callback queue and event status flag
 The key is implementing proper synchronization while maintaining thread safety and preventing deadlocks.
-"""
\ No newline at end of file
+"""
+
+import random
+import threading
+import time
+import weakref
+from itertools import islice
+from typing import Callable, Dict, Hashable, Tuple
+
+class _ThreadRecord:
+    """Per-thread count of fast-path callbacks running, nested ones included.
+
+    Only its own thread writes depth, so the updates need no lock.
+    """
+    __slots__ = ("depth", "__weakref__")
+
+    def __init__(self):
+        self.depth = 0
+
+class EventGate:
+    def __init__(self, batch_size: int = 256):
+        """Initialize a gate for the reg_cb scenario with repeated events.
+
+        Callbacks registered while an event is in progress are queued and
+        run once it ends, in registration order and in batches of
+        batch_size so the lock is released between batches. Callbacks
+        registered while no event is in progress run immediately without
+        taking the lock. The gate can open and close any number of times,
+        and overlapping begin_event() calls keep it closed until the last
+        matching end_event().
+
+        Args:
+            batch_size: Number of queued callbacks run per lock acquisition
+        """
+        self._batch_size = batch_size
+        self._cond = threading.Condition(threading.Lock())
+        self._open = True  # No event, nothing queued or draining
+        self._events = 0  # Events in progress
+        self._draining = None  # Ident of the thread draining the queue
+        # (thread ident, callback) -> callback, insertion ordered
+        self._pending: Dict[Tuple[int, Hashable], Callable] = {}
+        self._local = threading.local()
+        self._records = weakref.WeakSet()
+
+    def _record(self) -> _ThreadRecord:
+        """The calling thread's record, created and registered on first use."""
+        record = getattr(self._local, "record", None)
+        if record is None:
+            record = self._local.record = _ThreadRecord()
+            with self._cond:
+                self._records.add(record)
+        return record
+
+    def reg_cb(self, callback: Callable) -> bool:
+        """Run a callback now, or after the event in progress ends.
+
+        Registering the same callback again from the same thread while it is
+        still queued has no effect.
+
+        Returns:
+            bool: True if the callback ran immediately, False if it was queued
+        """
+        record = self._record()
+        while True:
+            if self._open:
+                # Announce the callback before re-checking the gate, so
+                # begin_event() either sees it running or we see it closed.
+                # A depth rather than a flag, a callback may call reg_cb too.
+                record.depth += 1
+                if self._open:
+                    try:
+                        self._run(callback)
+                    finally:
+                        self._leave(record)
+                    return True
+                self._leave(record)
+
+            with self._cond:
+                if not self._open:
+                    self._pending.setdefault((threading.get_ident(), callback), callback)
+                    return False
+            # The gate opened while waiting for the lock, try the fast path again
+
+    def _leave(self, record: _ThreadRecord) -> None:
+        """Drop out of the fast path, waking begin_event() if it is waiting."""
+        record.depth -= 1
+        if not record.depth and not self._open:
+            with self._cond:
+                self._cond.notify_all()
+
+    def begin_event(self) -> None:
+        """Close the gate, waiting for callbacks already running to finish.
+
+        A callback may begin an event itself; it then keeps running while
+        the event is in progress.
+        """
+        me = threading.get_ident()
+        with self._cond:
+            self._events += 1
+            self._open = False
+            while self._draining is not None and self._draining != me:
+                self._cond.wait()
+
+            # Wait for fast-path callbacks that started before the gate closed
+            mine = getattr(self._local, "record", None)
+            busy = [record for record in self._records if record.depth and record is not mine]
+            while busy:
+                self._cond.wait()
+                busy = [record for record in busy if record.depth]
+
+    def end_event(self) -> None:
+        """End an event and run the callbacks queued while it was in progress.
+
+        The queue is drained by the calling thread. If another event begins
+        meanwhile, draining stops after the current batch and the rest of
+        the queue waits for that event to end.
+        """
+        with self._cond:
+            if not self._events:
+                raise RuntimeError("end_event() called without begin_event()")
+            self._events -= 1
+            if self._events or self._draining is not None:
+                return
+            self._draining = threading.get_ident()
+
+        while True:
+            with self._cond:
+                if self._events or not self._pending:
+                    if not self._events:
+                        self._open = True
+                    self._draining = None
+                    self._cond.notify_all()
+                    return
+                if len(self._pending) <= self._batch_size:
+                    batch = list(self._pending.values())
+                    self._pending = {}
+                else:
+                    keys = list(islice(self._pending, self._batch_size))
+                    batch = [self._pending.pop(key) for key in keys]
+
+            for callback in batch:
+                self._run(callback)
+
+    def is_event_in_progress(self) -> bool:
+        """Check if an event is in progress."""
+        return self._events > 0
+
+    @staticmethod
+    def _run(callback: Callable) -> None:
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error executing callback: {e}")
+
+def stress_test(threads: int = 2000, calls_per_thread: int = 20, epochs: int = 50,
+                epoch_seconds: float = 0.002, seed: int = 0) -> None:
+    """Hammer an EventGate from many threads while events open and close.
+
+    Checks that every registered callback runs exactly once and never while
+    an event is in progress, and that duplicate registrations from one
+    thread during an event run once. Raises AssertionError otherwise.
+    """
+    gate = EventGate()
+    in_event = False
+    runs: Dict[Tuple[int, int], int] = {}
+    violations = []
+    queued = [0]
+    runs_lock = threading.Lock()
+    start = threading.Barrier(threads + 1)
+
+    def callback_for(key):
+        def callback():
+            if in_event:
+                violations.append(key)
+            with runs_lock:
+                runs[key] = runs.get(key, 0) + 1
+        return callback
+
+    def user(index):
+        rng = random.Random(seed * 1000003 + index)
+        start.wait()
+        for call in range(calls_per_thread):
+            if not gate.reg_cb(callback_for((index, call))):
+                with runs_lock:
+                    queued[0] += 1
+            if rng.random() < 0.1:
+                time.sleep(rng.random() * epoch_seconds)
+
+    workers = [threading.Thread(target=user, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    start.wait()
+    # Keep events coming until every user thread is done
+    events = 0
+    while events < epochs or any(worker.is_alive() for worker in workers):
+        events += 1
+        gate.begin_event()
+        in_event = True
+        time.sleep(epoch_seconds)
+        in_event = False
+        gate.end_event()
+        time.sleep(epoch_seconds)
+    for worker in workers:
+        worker.join()
+
+    lost = threads * calls_per_thread - len(runs)
+    doubled = sum(1 for count in runs.values() if count != 1)
+    assert not lost, f"{lost} callbacks never ran"
+    assert not doubled, f"{doubled} callbacks ran more than once"
+    assert not violations, f"{len(violations)} callbacks ran during an event"
+
+    # Duplicates from the same thread during an event collapse into one run
+    calls = []
+    def duplicate():
+        calls.append(1)
+    gate.begin_event()
+    gate.reg_cb(duplicate)
+    gate.reg_cb(duplicate)
+    gate.end_event()
+    assert len(calls) == 1, f"duplicate registration ran {len(calls)} times"
+
+    # A fast-path callback registering another one is still waited for
+    outer_saw_event = []
+    inside = threading.Event()
+    def outer():
+        gate.reg_cb(lambda: None)
+        inside.set()
+        time.sleep(0.05)
+        outer_saw_event.append(in_event)
+    caller = threading.Thread(target=gate.reg_cb, args=(outer,))
+    caller.start()
+    inside.wait()
+    gate.begin_event()
+    in_event = True
+    time.sleep(0.1)
+    in_event = False
+    gate.end_event()
+    caller.join()
+    assert outer_saw_event == [False], "nested registration let an event start under its caller"
+    print(f"Stress test passed: {threads} threads, {len(runs)} callbacks "
+          f"({queued[0]} queued), {events} events")
+
+if __name__ == "__main__":
+    gate = EventGate()
+    gate.begin_event()
+    gate.reg_cb(lambda: print("f1 executed after the event"))
+    gate.reg_cb(lambda: print("f2 executed after the event"))
+    print("Event completed")
+    gate.end_event()
+    gate.reg_cb(lambda: print("f3 executed immediately"))
+
+    stress_test()
@@ -0,0 +1,331 @@
+"""Contention Benchmark
+
+Run: python3 contention_bench.py [--threads 1 8 64 256] [--workloads ...]
+                                 [--mix eventfire=register:99,fire:1]
+                                 [--ops N] [--output results.json]
+                                 [--baseline baseline.json] [--tolerance 0.2]
+
+Drives EventFire and UniqueIdGenerator from many threads at once with a
+configurable mix of requests and reports, per workload and thread count,
+throughput, p50/p99/p999 latency of single requests and the total time
+threads spent blocked on the primitive's locks, as JSON. The report records
+whether the GIL was enabled, so runs on free-threaded CPython can be told
+apart from (and compared with) regular builds.
+
+With --baseline, results are compared against a previous JSON report and
+the exit code is 1 if throughput dropped or tail latency grew by more than
+the tolerance, so locking changes that hurt contention show up before they
+ship.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import sysconfig
+import time
+from array import array
+from threading import Barrier, Condition, Lock, Thread, local
+
+import eventfire
+import uniqueid
+
+class _TimedLock:
+    """Lock recording how long benchmark threads waited to acquire it.
+
+    Uncontended acquires take the non-blocking path and aren't timed, so
+    the instrumentation costs almost nothing unless threads actually wait.
+    """
+
+    def __init__(self, stats):
+        self._lock = Lock()
+        self._stats = stats
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter_ns()
+        acquired = self._lock.acquire(True, timeout)
+        self._stats.add(time.perf_counter_ns() - start)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info):
+        self._lock.release()
+
+class _LockWaitStats:
+    """Lock wait time summed per thread, only for threads that enabled it."""
+
+    def __init__(self):
+        self._local = local()
+        self._totals = []
+        self._totals_lock = Lock()
+
+    def enable(self):
+        """Start counting the calling thread's lock waits."""
+        total = array('Q', [0])
+        self._local.total = total
+        with self._totals_lock:
+            self._totals.append(total)
+
+    def add(self, nanoseconds):
+        total = getattr(self._local, "total", None)
+        if total is not None:  # Not a background thread
+            total[0] += nanoseconds
+
+    def total_seconds(self):
+        return sum(total[0] for total in self._totals) / 1e9
+
+class _TimedUniqueIdGenerator(uniqueid.UniqueIdGenerator):
+    """UniqueIdGenerator whose locks are _TimedLocks."""
+
+    def __init__(self, stats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def _start_refill_thread(self):
+        # Swap the locks before the refill thread starts using them
+        self.lock = _TimedLock(self._stats)
+        self.condition = Condition(self.lock)
+        self._range.reserve_lock = _TimedLock(self._stats)
+        super()._start_refill_thread()
+
+def _noop():
+    pass
+
+def _eventfire_setup(stats, batch):
+    fire = eventfire.EventFire()
+    fire._lock = _TimedLock(stats)
+
+    def register():
+        fire.register_callback(_noop)
+
+    def fire_and_reset():
+        fire.fire()
+        fire.reset()
+
+    return {"register": register, "fire": fire_and_reset}, None
+
+def _uniqueid_setup(stats, batch):
+    generator = _TimedUniqueIdGenerator(stats, buffer_size=100000)
+    operations = {
+        "one": generator.getOneId,
+        "ids": lambda: generator.getIds(batch),
+        "range": lambda: generator.getIdRange(batch),
+    }
+    return operations, generator.stop
+
+# workload name -> (setup(stats, batch) -> (operations, cleanup), default mix)
+WORKLOADS = {
+    "eventfire": (_eventfire_setup, {"register": 99, "fire": 1}),
+    "uniqueid": (_uniqueid_setup, {"one": 90, "ids": 10}),
+}
+
+def parse_mix(text):
+    """Parse "op:weight,op:weight" into a dict of weights."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition(":")
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+def _percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+def _gil_enabled():
+    """Whether the GIL is enabled, True on builds that can't disable it."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled() if is_gil_enabled is not None else True
+
+def run_workload(workload, threads, ops_per_thread=2000, mix=None, batch=16, seed=0):
+    """Run one workload with a number of threads hammering one instance.
+
+    Args:
+        workload (str): One of WORKLOADS
+        threads (int): Number of threads issuing requests concurrently
+        ops_per_thread (int): Requests issued by each thread
+        mix (dict): Operation name -> relative weight, the workload's
+            default mix when None
+        batch (int): Number of IDs requested by batched operations
+        seed (int): Seed of the per-thread operation sequences
+
+    Returns:
+        dict: JSON-serializable result
+    """
+    setup, default_mix = WORKLOADS[workload]
+    mix = {name: float(weight) for name, weight in (mix or default_mix).items()}
+    stats = _LockWaitStats()
+    operations, cleanup = setup(stats, batch)
+    unknown = set(mix) - set(operations)
+    if unknown:
+        raise ValueError(f"unknown {workload} operations: {', '.join(sorted(unknown))}")
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    # Operation sequences are drawn up front so the RNG stays out of the timings
+    plans = []
+    for index in range(threads):
+        rng = random.Random(f"{workload}:{seed}:{index}")
+        plans.append([operations[name] for name in rng.choices(names, weights, k=ops_per_thread)])
+    latencies = [array('Q') for _ in range(threads)]
+    start = Barrier(threads + 1)
+    clock = time.perf_counter_ns
+
+    def worker(index):
+        plan = plans[index]
+        samples = latencies[index]
+        append = samples.append
+        stats.enable()
+        start.wait()
+        for operation in plan:
+            begin = clock()
+            operation()
+            append(clock() - begin)
+
+    workers = [Thread(target=worker, args=(index,)) for index in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    if cleanup is not None:
+        cleanup()
+
+    samples = sorted(sample for thread_samples in latencies for sample in thread_samples)
+    total_ops = threads * ops_per_thread
+    lock_wait = stats.total_seconds()
+    return {
+        "workload": workload,
+        "threads": threads,
+        "mix": mix,
+        "ops": total_ops,
+        "seconds": elapsed,
+        "ops_per_s": total_ops / elapsed if elapsed else None,
+        "p50_us": _percentile(samples, 0.50) / 1e3 if samples else None,
+        "p99_us": _percentile(samples, 0.99) / 1e3 if samples else None,
+        "p999_us": _percentile(samples, 0.999) / 1e3 if samples else None,
+        "lock_wait_s": lock_wait,
+        # Share of the threads' combined time spent blocked on locks
+        "lock_wait_fraction": lock_wait / (elapsed * threads) if elapsed else None,
+    }
+
+def run_benchmark(thread_counts=(1, 8, 64, 256), workloads=None, mixes=None,
+                  ops_per_thread=2000, batch=16, seed=0):
+    """Run every workload at every thread count.
+
+    Args:
+        thread_counts (list): Thread counts to run
+        workloads (list): Workload names to run, all of WORKLOADS when None
+        mixes (dict): Workload name -> mix, default mixes for missing ones
+        ops_per_thread (int): Requests issued by each thread
+        batch (int): Number of IDs requested by batched operations
+        seed (int): Seed of the operation sequences
+
+    Returns:
+        dict: JSON-serializable report
+    """
+    mixes = mixes or {}
+    results = []
+    for workload in workloads or WORKLOADS:
+        for threads in thread_counts:
+            results.append(run_workload(workload, threads, ops_per_thread,
+                                        mixes.get(workload), batch, seed))
+
+    return {
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "free_threaded_build": bool(sysconfig.get_config_var("Py_GIL_DISABLED")),
+        "gil_enabled": _gil_enabled(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ops_per_thread": ops_per_thread,
+        "batch": batch,
+        "seed": seed,
+        "results": results,
+    }
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    """List regressions of report against baseline.
+
+    A run regresses if its throughput dropped, or its p99 or p999 latency
+    grew, by more than tolerance (a fraction) for the same workload, thread
+    count and mix.
+
+    Returns:
+        list: Human-readable description of each regression
+    """
+    def key(result):
+        return result["workload"], result["threads"], json.dumps(result["mix"], sort_keys=True)
+
+    previous = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        name = f'{result["workload"]} with {result["threads"]} threads'
+        if old["ops_per_s"] and result["ops_per_s"] is not None \
+                and result["ops_per_s"] < old["ops_per_s"] * (1 - tolerance):
+            regressions.append(f'{name}: {old["ops_per_s"]:.0f} -> {result["ops_per_s"]:.0f} ops/s')
+        for field in ("p99_us", "p999_us"):
+            if old[field] is not None and result[field] is not None \
+                    and result[field] > old[field] * (1 + tolerance):
+                regressions.append(f'{name}: {field} {old[field]:.1f} -> {result[field]:.1f}')
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark EventFire and UniqueIdGenerator under contention")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 64, 256])
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS))
+    parser.add_argument("--mix", action="append", default=[], metavar="WORKLOAD=OP:WEIGHT,...",
+                        help="request mix of a workload, e.g. uniqueid=one:50,range:50")
+    parser.add_argument("--ops", type=int, default=2000, help="requests per thread")
+    parser.add_argument("--batch", type=int, default=16, help="IDs per batched request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown before reporting a regression")
+    args = parser.parse_args(argv)
+
+    mixes = {}
+    for text in args.mix:
+        workload, _, mix = text.partition("=")
+        if workload not in WORKLOADS:
+            parser.error(f"unknown workload in --mix: {workload}")
+        mixes[workload] = parse_mix(mix)
+
+    report = run_benchmark(args.threads, args.workloads, mixes, args.ops, args.batch, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
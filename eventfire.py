@@ -3,54 +3,122 @@
 2. if event is already fired, new registration comes, run the callback immediately
 """
 
-from threading import Lock
-from typing import Callable, List
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from itertools import count
+from threading import Lock, RLock
+import asyncio
+import concurrent.futures
+import inspect
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+class FireResult:
+    """Futures of the callbacks run by one EventFire.fire() call."""
+
+    def __init__(self, futures: List[Tuple[Callable, Future]]):
+        self.futures = futures
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the callbacks to finish.
+
+        Args:
+            timeout: Maximum number of seconds to wait, None to wait forever
+
+        Returns:
+            bool: True if every callback finished within the timeout
+        """
+        _, not_done = wait([future for _, future in self.futures], timeout=timeout)
+        return not not_done
+
+    @property
+    def errors(self) -> List[Tuple[Callable, BaseException]]:
+        """(callback, exception) for every finished callback that raised."""
+        return [(callback, future.exception()) for callback, future in self.futures
+                if future.done() and not future.cancelled() and future.exception() is not None]
+
+def _report_error(future: Future) -> None:
+    """Print the error of a failed callback, like serial dispatch does."""
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Error executing callback: {future.exception()}")
 
 class EventFire:
-    def __init__(self):
-        """Initialize the event fire system."""
+    def __init__(self, executor: Optional[Executor] = None):
+        """Initialize the event fire system.
+
+        Args:
+            executor: Executor to run callbacks on, e.g. a ThreadPoolExecutor
+                whose max_workers bounds the concurrency. Callbacks run on
+                the calling thread when None.
+        """
         self._callbacks: List[Callable] = []
         self._is_fired = False
         self._lock = Lock()
+        self._executor = executor
+
+    def _dispatch(self, callback: Callable) -> Future:
+        """Run a callback on the executor, or right here without one.
+
+        Returns:
+            Future: Future holding the callback's result or exception
+        """
+        if self._executor is not None:
+            future = self._executor.submit(callback)
+            future.add_done_callback(_report_error)
+            return future
+
+        future = Future()
+        try:
+            future.set_result(callback())
+        except Exception as e:
+            print(f"Error executing callback: {e}")
+            future.set_exception(e)
+        return future
 
-    def register_callback(self, callback: Callable) -> None:
+    def register_callback(self, callback: Callable) -> Optional[Future]:
         """Register a callback to be executed when the event fires.
         If the event has already fired, execute the callback immediately.
 
         Args:
             callback: A callable function to be executed
+
+        Returns:
+            Future of the callback if it was run immediately, None otherwise
         """
         with self._lock:
-            if self._is_fired:
-                # If event already fired, execute callback immediately
-                try:
-                    callback()
-                except Exception as e:
-                    print(f"Error executing callback: {e}")
-            else:
+            if not self._is_fired:
                 # Add callback to the list for future execution
                 self._callbacks.append(callback)
+                return None
 
-    def fire(self) -> None:
+        # Event already fired, run outside the lock so a slow callback
+        # doesn't block other registrations
+        return self._dispatch(callback)
+
+    def fire(self, timeout: Optional[float] = None) -> FireResult:
         """Fire the event and execute all registered callbacks.
         Once fired, the event stays in fired state and future registrations
-        will be executed immediately."""
-        callbacks_to_execute = []
+        will be executed immediately.
 
+        Args:
+            timeout: With an executor, wait up to this many seconds for the
+                callbacks before returning; None returns right away
+
+        Returns:
+            FireResult: Futures of the callbacks, empty if already fired
+        """
         with self._lock:
             if self._is_fired:
-                return  # Event already fired
-            
+                return FireResult([])  # Event already fired
+
             self._is_fired = True
             callbacks_to_execute = self._callbacks.copy()
             self._callbacks.clear()
 
         # Execute callbacks outside the lock to prevent deadlocks
-        for callback in callbacks_to_execute:
-            try:
-                callback()
-            except Exception as e:
-                print(f"Error executing callback: {e}")
+        result = FireResult([(callback, self._dispatch(callback)) for callback in callbacks_to_execute])
+        if timeout is not None:
+            result.wait(timeout)
+        return result
 
     def reset(self) -> None:
         """Reset the event fire system to its initial state."""
@@ -68,6 +136,296 @@ class EventFire:
         with self._lock:
             return self._is_fired
 
+class AsyncEventFire:
+    def __init__(self, limit: Optional[int] = None):
+        """Initialize the asyncio event fire system.
+
+        Same semantics as EventFire for coroutine callbacks: callbacks
+        registered before the fire wait for it, later ones run immediately.
+        Everything runs as tasks on one event loop, so fanning out to many
+        subscribers or waiters needs no threads.
+
+        Args:
+            limit: Maximum number of callbacks running at once, None for no limit
+        """
+        self._callbacks: List[Callable] = []
+        self._is_fired = False
+        self._fired = asyncio.Event()
+        self._limit = limit
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """Remember the event loop this event is used from."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    async def _run(self, callback: Callable, semaphore: Optional[asyncio.Semaphore]) -> Optional[BaseException]:
+        """Run one sync or coroutine callback, returning its error if it raised."""
+        try:
+            if semaphore is None:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            else:
+                async with semaphore:
+                    result = callback()
+                    if inspect.isawaitable(result):
+                        await result
+        except Exception as e:
+            print(f"Error executing callback: {e}")
+            return e
+        return None
+
+    def register_callback(self, callback: Callable) -> Optional[asyncio.Task]:
+        """Register a callback to be executed when the event fires.
+        If the event has already fired, schedule the callback immediately.
+        Must be called from the event loop.
+
+        Args:
+            callback: A coroutine function or plain callable
+
+        Returns:
+            Task running the callback if the event already fired, None otherwise
+        """
+        loop = self._bind_loop()
+        if self._is_fired:
+            return loop.create_task(self._run(callback, None))
+        self._callbacks.append(callback)
+        return None
+
+    async def fire(self) -> List[Tuple[Callable, BaseException]]:
+        """Fire the event and run all registered callbacks concurrently.
+        Once fired, the event stays in fired state and future registrations
+        will be executed immediately.
+
+        Returns:
+            List of (callback, exception) for every callback that raised
+        """
+        self._bind_loop()
+        if self._is_fired:
+            return []  # Event already fired
+
+        self._is_fired = True
+        callbacks_to_execute = self._callbacks
+        self._callbacks = []
+        self._fired.set()
+
+        semaphore = asyncio.Semaphore(self._limit) if self._limit else None
+        errors = await asyncio.gather(*(self._run(callback, semaphore) for callback in callbacks_to_execute))
+        return [(callback, error) for callback, error in zip(callbacks_to_execute, errors) if error is not None]
+
+    def fire_threadsafe(self) -> concurrent.futures.Future:
+        """Fire the event from a thread other than the event loop's.
+
+        The fire is handed to the loop with call_soon_threadsafe (through
+        run_coroutine_threadsafe), so the callbacks still run on the loop.
+
+        Returns:
+            concurrent.futures.Future resolving to the result of fire()
+        """
+        if self._loop is None:
+            raise RuntimeError("Event has not been used from an event loop yet")
+        return asyncio.run_coroutine_threadsafe(self.fire(), self._loop)
+
+    async def wait_fired(self) -> None:
+        """Wait until the event fires, without registering a callback."""
+        self._bind_loop()
+        await self._fired.wait()
+
+    def reset(self) -> None:
+        """Reset the event fire system to its initial state."""
+        self._is_fired = False
+        self._callbacks.clear()
+        self._fired.clear()
+
+    @property
+    def is_fired(self) -> bool:
+        """Check if the event has been fired.
+
+        Returns:
+            bool: True if the event has been fired, False otherwise
+        """
+        return self._is_fired
+
+class Subscription:
+    """Token returned by EventBus.subscribe, used to unsubscribe in O(1)."""
+    __slots__ = ("_bus", "topic", "key")
+
+    def __init__(self, bus: "EventBus", topic: str, key: int):
+        self._bus = bus
+        self.topic = topic
+        self.key = key
+
+    def unsubscribe(self) -> bool:
+        """Remove the subscription.
+
+        Returns:
+            bool: True if it was still subscribed
+        """
+        return self._bus.unsubscribe(self)
+
+class _Topic:
+    """Subscribers and fired state of one EventBus topic."""
+    __slots__ = ("subscribers", "order", "fired_args")
+
+    def __init__(self):
+        # key -> (priority, callback or weak reference to it, is weak, once)
+        self.subscribers: Dict[int, Tuple[int, Any, bool, bool]] = {}
+        self.order: Optional[List[Tuple[int, Tuple[int, Any, bool, bool]]]] = None  # Dispatch order cache
+        self.fired_args: Optional[Tuple[tuple, dict]] = None  # Set once a one-shot fire happened
+
+class EventBus:
+    def __init__(self):
+        """Initialize an event bus holding any number of named topics.
+
+        Replaces one EventFire per object: topics only exist while they
+        have subscribers (or remember a one-shot fire), so idle topics
+        cost nothing, and firing a topic only touches its own subscribers.
+        Bound methods are held through weak references and drop out when
+        their object is garbage collected.
+        """
+        self._topics: Dict[str, _Topic] = {}
+        # Reentrant because weak reference callbacks can run during garbage
+        # collection triggered while the lock is held
+        self._lock = RLock()
+        self._keys = count()
+
+    def subscribe(self, topic: str, callback: Callable, priority: int = 0,
+                  once: bool = False, weak: bool = True) -> Optional[Subscription]:
+        """Subscribe a callback to a topic.
+
+        If a one-shot fire already happened on the topic, the callback runs
+        immediately with the fired arguments instead, like EventFire.
+
+        Args:
+            topic: Name of the topic
+            callback: Called with the arguments passed to fire
+            priority: Higher priorities run first, ties in subscription order
+            once: Remove the subscription after its first delivery
+            weak: Hold bound methods through a weak reference
+
+        Returns:
+            Subscription token, None if the callback already ran
+        """
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is None:
+                state = self._topics[topic] = _Topic()
+            fired_args = state.fired_args
+            if fired_args is None:
+                key = next(self._keys)
+                if weak and inspect.ismethod(callback):
+                    target = weakref.WeakMethod(callback, lambda _, topic=topic, key=key: self._remove(topic, key))
+                    state.subscribers[key] = (priority, target, True, once)
+                else:
+                    state.subscribers[key] = (priority, callback, False, once)
+                state.order = None
+                return Subscription(self, topic, key)
+
+        # Topic already fired once, run outside the lock
+        args, kwargs = fired_args
+        try:
+            callback(*args, **kwargs)
+        except Exception as e:
+            print(f"Error executing callback: {e}")
+        return None
+
+    def _remove(self, topic: str, key: int) -> bool:
+        """Remove one subscriber and drop the topic if nothing is left of it."""
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is None or state.subscribers.pop(key, None) is None:
+                return False
+            state.order = None
+            if not state.subscribers and state.fired_args is None:
+                del self._topics[topic]
+            return True
+
+    def unsubscribe(self, subscription: Subscription) -> bool:
+        """Remove a subscription.
+
+        Returns:
+            bool: True if it was still subscribed
+        """
+        return self._remove(subscription.topic, subscription.key)
+
+    def _fire(self, topic: str, args: tuple, kwargs: dict, one_shot: bool) -> List[Tuple[Callable, BaseException]]:
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is None:
+                if not one_shot:
+                    return []
+                state = self._topics[topic] = _Topic()
+            if state.fired_args is not None:
+                return []  # One-shot topic already fired
+
+            if state.order is None:
+                state.order = sorted(state.subscribers.items(), key=lambda item: (-item[1][0], item[0]))
+            entries = state.order
+            if one_shot:
+                state.fired_args = (args, kwargs)
+                state.subscribers.clear()
+                state.order = None
+            else:
+                for key, (_, _, _, once) in entries:
+                    if once:
+                        del state.subscribers[key]
+                        state.order = None
+                if not state.subscribers:
+                    del self._topics[topic]
+
+        errors = []
+        for _, (_, target, is_weak, _) in entries:
+            callback = target() if is_weak else target
+            if callback is None:
+                continue  # Object died before its weak reference callback ran
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                print(f"Error executing callback: {e}")
+                errors.append((callback, e))
+        return errors
+
+    def fire(self, topic: str, *args, **kwargs) -> List[Tuple[Callable, BaseException]]:
+        """Fire a recurring event, running its subscribers by priority.
+
+        Subscribers stay subscribed (except once subscriptions), so the topic
+        can fire again.
+
+        Returns:
+            List of (callback, exception) for every callback that raised
+        """
+        return self._fire(topic, args, kwargs, one_shot=False)
+
+    def fire_once(self, topic: str, *args, **kwargs) -> List[Tuple[Callable, BaseException]]:
+        """Fire a one-shot event, like EventFire.fire.
+
+        The subscribers run by priority and are dropped; later subscribers
+        run immediately with the same arguments, until reset().
+
+        Returns:
+            List of (callback, exception) for every callback that raised
+        """
+        return self._fire(topic, args, kwargs, one_shot=True)
+
+    def reset(self, topic: str) -> None:
+        """Forget a one-shot fire and all subscribers of a topic."""
+        with self._lock:
+            self._topics.pop(topic, None)
+
+    def is_fired(self, topic: str) -> bool:
+        """Check if a one-shot fire happened on a topic."""
+        with self._lock:
+            state = self._topics.get(topic)
+            return state is not None and state.fired_args is not None
+
+    def subscriber_count(self, topic: str) -> int:
+        """Number of live subscriptions of a topic."""
+        with self._lock:
+            state = self._topics.get(topic)
+            return len(state.subscribers) if state is not None else 0
+
 # Example usage
 if __name__ == "__main__":
     def callback1():
@@ -90,4 +448,37 @@ if __name__ == "__main__":
     def callback3():
         print("Callback 3 executed immediately")
 
-    event.register_callback(callback3)
\ No newline at end of file
+    event.register_callback(callback3)
+
+    # Run callbacks on a bounded thread pool and collect their errors
+    def failing_callback():
+        raise RuntimeError("subscriber failed")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        parallel_event = EventFire(executor=pool)
+        for callback in (callback1, callback2, failing_callback):
+            parallel_event.register_callback(callback)
+        result = parallel_event.fire(timeout=5.0)
+        print(f"Callbacks finished: {result.wait(0)}, errors: {result.errors}")
+
+    # Many named events in one bus
+    bus = EventBus()
+    bus.subscribe("volume-1/deleted", lambda name: print(f"Low priority saw {name}"))
+    bus.subscribe("volume-1/deleted", lambda name: print(f"High priority saw {name}"), priority=10)
+    bus.fire("volume-1/deleted", "volume-1")
+
+    # Coroutine callbacks on an asyncio event
+    async def async_demo():
+        async_event = AsyncEventFire(limit=100)
+
+        async def async_callback():
+            await asyncio.sleep(0.01)
+            print("Async callback executed")
+
+        async_event.register_callback(async_callback)
+        waiter = asyncio.get_running_loop().create_task(async_event.wait_fired())
+        await async_event.fire()
+        await waiter
+        print("Waiter woke up after fire")
+
+    asyncio.run(async_demo())
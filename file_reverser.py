@@ -10,7 +10,16 @@ Follow up:
 1. If the file is very large 2. Available memory is very low, how would you approach this challenge?
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import mmap
 import os
+import sys
+import tempfile
+import time
+
+MIN_CHUNK_SIZE = 1 << 20
+MAX_CHUNK_SIZE = 64 << 20
 
 def reverse_file_by_lines(input_path, output_path, chunk_size=8192):
     """Reverse a file line by line using a memory-efficient approach.
@@ -61,6 +70,64 @@ def reverse_file_by_lines(input_path, output_path, chunk_size=8192):
             line = fin.read(line_end - line_start)
             fout.write(line)
 
+def _reversed_line_blocks(read, start, end, chunk_size):
+    """Yield the line-reversed output of bytes start..end-1, one block at a time.
+    
+    Args:
+        read (callable): read(offset, size) returning that many input bytes
+        start (int): First byte of the range
+        end (int): One past the last byte of the range
+        chunk_size (int): Size of blocks to read at a time
+    """
+    # Pieces of the line that continues past the current block, latest first
+    carry = []
+    pos = end
+    while pos > start:
+        chunk_start = max(start, pos - chunk_size)
+        chunk = read(chunk_start, pos - chunk_start)
+        pos = chunk_start
+        
+        # Like reverse_file_by_lines, every line segment starts at its newline
+        parts = chunk.split(b'\n')
+        if len(parts) == 1:
+            carry.append(chunk)
+            continue
+        
+        carry.append(parts[-1])
+        parts[-1] = b''.join(reversed(carry))
+        carry = [parts[0]]
+        parts.reverse()
+        parts.pop()
+        yield b'\n' + b'\n'.join(parts)
+    
+    yield b''.join(reversed(carry))
+
+def reverse_file_by_lines_streaming(input_path, output_path, chunk_size=1 << 20):
+    """Reverse a file line by line in a single backward pass.
+    
+    Produces the same output as reverse_file_by_lines, but instead of
+    collecting every newline offset first, each block read from the end of
+    the file is split at its newlines and its lines are written out in
+    reverse right away. Only the partial line at the start of a block is
+    carried over to the next block, so peak memory is
+    O(chunk_size + longest line) rather than O(number of lines), and there
+    is one read per block instead of one seek and read per line.
+    
+    Args:
+        input_path (str): Path to the input file
+        output_path (str): Path to save the reversed output
+        chunk_size (int): Size of blocks to read at a time
+    """
+    file_size = os.path.getsize(input_path)
+    
+    with open(input_path, 'rb') as fin, open(output_path, 'wb') as fout:
+        def read(offset, size):
+            fin.seek(offset)
+            return fin.read(size)
+        
+        for block in _reversed_line_blocks(read, 0, file_size, chunk_size):
+            fout.write(block)
+
 def reverse_file_content(input_path, output_path, chunk_size=8192):
     """Reverse entire file content using a memory-efficient approach.
     
@@ -102,6 +169,308 @@ def reverse_file_content(input_path, output_path, chunk_size=8192):
             left += left_size
             right -= right_size
 
+def _adaptive_chunk_size(file_size):
+    """Pick a buffer size that keeps the number of I/O calls small for big files."""
+    return min(max(file_size // 64, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+
+def _reverse_in_place(path, chunk_size):
+    """Reverse a file's content in place by swapping mirrored chunks through mmap."""
+    with open(path, 'r+b') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0) as mm:
+            left, right = 0, len(mm)
+            while right - left >= 2 * chunk_size:
+                left_chunk = mm[left:left + chunk_size]
+                mm[left:left + chunk_size] = mm[right - chunk_size:right][::-1]
+                mm[right - chunk_size:right] = left_chunk[::-1]
+                left += chunk_size
+                right -= chunk_size
+            # Middle part is smaller than two chunks, reverse it in one go
+            mm[left:right] = mm[left:right][::-1]
+
+def reverse_file_content_fast(input_path, output_path, chunk_size=None):
+    """Reverse entire file content with large buffers and C-level slice reversal.
+    
+    Produces the same output as reverse_file_content. Blocks are read from
+    the end of the input and written front to back, so the output is
+    written sequentially. If output_path is the input file itself, the
+    content is reversed in place through mmap, which needs no second copy
+    of the file on disk.
+    
+    Args:
+        input_path (str): Path to the input file
+        output_path (str): Path to save the reversed output, may be input_path
+        chunk_size (int): Size of chunks to read at a time, picked from the
+            file size when None
+    """
+    file_size = os.path.getsize(input_path)
+    if chunk_size is None:
+        chunk_size = _adaptive_chunk_size(file_size)
+    
+    if os.path.exists(output_path) and os.path.samefile(input_path, output_path):
+        _reverse_in_place(input_path, chunk_size)
+        return
+    
+    with open(input_path, 'rb') as fin, open(output_path, 'wb') as fout:
+        pos = file_size
+        while pos > 0:
+            chunk_start = max(0, pos - chunk_size)
+            fin.seek(chunk_start)
+            fout.write(fin.read(pos - chunk_start)[::-1])
+            pos = chunk_start
+
+def _snap_to_newlines(input_path, file_size, segments, chunk_size):
+    """Split [0, file_size) into at most segments ranges that start at a newline.
+    
+    Each nominal boundary is moved forward to the next newline, which only
+    reads from the boundary up to that newline.
+    """
+    boundaries = [0]
+    with open(input_path, 'rb') as f:
+        fd = f.fileno()
+        for i in range(1, segments):
+            pos = max(file_size * i // segments, boundaries[-1] + 1)
+            while pos < file_size:
+                window = os.pread(fd, min(chunk_size, file_size - pos), pos)
+                newline = window.find(b'\n')
+                if newline >= 0:
+                    pos += newline
+                    break
+                pos += len(window)
+            if pos >= file_size:
+                break
+            boundaries.append(pos)
+    boundaries.append(file_size)
+    return list(zip(boundaries, boundaries[1:]))
+
+def _reverse_content_segment(input_path, output_path, start, end, chunk_size):
+    """Reverse bytes start..end-1 of the input into their mirrored output position."""
+    fin = os.open(input_path, os.O_RDONLY)
+    fout = os.open(output_path, os.O_WRONLY)
+    try:
+        file_size = os.fstat(fin).st_size
+        pos = end
+        while pos > start:
+            chunk_start = max(start, pos - chunk_size)
+            chunk = os.pread(fin, pos - chunk_start, chunk_start)
+            os.pwrite(fout, chunk[::-1], file_size - pos)
+            pos = chunk_start
+    finally:
+        os.close(fin)
+        os.close(fout)
+
+def _reverse_lines_segment(input_path, output_path, start, end, chunk_size):
+    """Line-reverse bytes start..end-1 of the input into their mirrored output position."""
+    fin = os.open(input_path, os.O_RDONLY)
+    fout = os.open(output_path, os.O_WRONLY)
+    try:
+        out_pos = os.fstat(fin).st_size - end
+        def read(offset, size):
+            return os.pread(fin, size, offset)
+        
+        for block in _reversed_line_blocks(read, start, end, chunk_size):
+            os.pwrite(fout, block, out_pos)
+            out_pos += len(block)
+    finally:
+        os.close(fin)
+        os.close(fout)
+
+def _run_segments(worker, input_path, output_path, segments, workers, chunk_size):
+    """Pre-size the output and run worker on every segment in a process pool."""
+    if os.path.exists(output_path) and os.path.samefile(input_path, output_path):
+        raise ValueError("Parallel reversal cannot write to its own input file")
+    with open(output_path, 'wb') as f:
+        f.truncate(os.path.getsize(input_path))
+    
+    if workers == 1 or len(segments) == 1:
+        for start, end in segments:
+            worker(input_path, output_path, start, end, chunk_size)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(worker, input_path, output_path, start, end, chunk_size)
+                   for start, end in segments]
+        for future in futures:
+            future.result()
+
+def reverse_file_content_parallel(input_path, output_path, workers=None, chunk_size=None):
+    """Reverse entire file content with several processes using positional I/O.
+    
+    The file is split into one segment per worker. Each worker reverses its
+    segment with os.pread/os.pwrite straight into the mirrored range of the
+    pre-sized output, so no data passes between processes. Produces the
+    same output as reverse_file_content.
+    
+    Args:
+        input_path (str): Path to the input file
+        output_path (str): Path to save the reversed output
+        workers (int): Number of worker processes, os.cpu_count() when None
+        chunk_size (int): Size of chunks to read at a time, picked from the
+            segment size when None
+    """
+    workers = workers or os.cpu_count() or 1
+    file_size = os.path.getsize(input_path)
+    segments = [(file_size * i // workers, file_size * (i + 1) // workers) for i in range(workers)]
+    segments = [(start, end) for start, end in segments if start < end]
+    if chunk_size is None:
+        chunk_size = _adaptive_chunk_size(file_size // workers)
+    _run_segments(_reverse_content_segment, input_path, output_path, segments, workers, chunk_size)
+
+def reverse_file_by_lines_parallel(input_path, output_path, workers=None, chunk_size=1 << 20):
+    """Reverse a file line by line with several processes using positional I/O.
+    
+    Segment boundaries are snapped to newlines first, so every segment holds
+    whole line segments and its reversed lines land in the mirrored range of
+    the output. Produces the same output as reverse_file_by_lines.
+    
+    Args:
+        input_path (str): Path to the input file
+        output_path (str): Path to save the reversed output
+        workers (int): Number of worker processes, os.cpu_count() when None
+        chunk_size (int): Size of blocks to read at a time
+    """
+    workers = workers or os.cpu_count() or 1
+    file_size = os.path.getsize(input_path)
+    segments = _snap_to_newlines(input_path, file_size, workers, chunk_size) if file_size else []
+    _run_segments(_reverse_lines_segment, input_path, output_path, segments, workers, chunk_size)
+
+def _iter_lines_backward(f, end, chunk_size):
+    """Yield the lines of bytes 0..end-1 of f, last line first."""
+    # Views of the line that continues past the current block, latest first
+    carry = []
+    pos = end
+    while pos > 0:
+        block_start = max(0, pos - chunk_size)
+        f.seek(block_start)
+        block = f.read(pos - block_start)
+        view = memoryview(block)
+        pos = block_start
+        
+        newline = block.rfind(b'\n')
+        if newline < 0:
+            carry.append(view)
+            continue
+        
+        # Line that starts in this block and ends in a later one (or at EOF)
+        if carry:
+            carry.append(view[newline + 1:])
+            yield memoryview(b''.join(reversed(carry)))
+        elif newline + 1 < len(block):
+            yield view[newline + 1:]
+        
+        stop = newline + 1
+        while True:
+            prev = block.rfind(b'\n', 0, stop - 1)
+            if prev < 0:
+                break
+            yield view[prev + 1:stop]
+            stop = prev + 1
+        carry = [view[:stop]]
+    
+    if len(carry) == 1:
+        yield carry[0]
+    elif carry:
+        yield memoryview(b''.join(reversed(carry)))
+
+def _last_line_start(f, end, chunk_size):
+    """Offset just past the last newline in bytes 0..end-1 of f, 0 if none."""
+    pos = end
+    while pos > 0:
+        block_start = max(0, pos - chunk_size)
+        f.seek(block_start)
+        newline = f.read(pos - block_start).rfind(b'\n')
+        if newline >= 0:
+            return block_start + newline + 1
+        pos = block_start
+    return 0
+
+def _follow_lines(f, pos, chunk_size, poll_interval):
+    """Yield complete lines appended to f after pos, oldest first, forever."""
+    partial = b''
+    while True:
+        size = os.fstat(f.fileno()).st_size
+        if size < pos:
+            # File was truncated, start over from its beginning
+            pos, partial = 0, b''
+        if size == pos:
+            time.sleep(poll_interval)
+            continue
+        
+        f.seek(pos)
+        data = f.read(min(chunk_size, size - pos))
+        pos += len(data)
+        data = partial + data
+        view = memoryview(data)
+        start = 0
+        while True:
+            newline = data.find(b'\n', start)
+            if newline < 0:
+                break
+            yield view[start:newline + 1]
+            start = newline + 1
+        partial = data[start:]
+
+def iter_lines_reversed(path, chunk_size=1 << 16, max_lines=None, follow=False, poll_interval=1.0):
+    """Lazily yield the lines of a file from the last one to the first (like tac).
+    
+    Blocks are read backward from the end of the file only as lines are
+    consumed, so reading the last few lines of a huge file costs a few
+    block reads no matter its size. Lines are memoryview slices of the block
+    they were read from, which avoids a copy per line; only a line spanning
+    two blocks is joined into a new buffer. Each line keeps its trailing
+    newline, except a last line that has none.
+    
+    Args:
+        path (str): Path to the input file
+        chunk_size (int): Size of blocks to read at a time
+        max_lines (int): Stop after this many lines from the end, None for all
+        follow (bool): After the existing lines, keep yielding lines appended
+            to the file, oldest first, like tail -f. An unterminated last
+            line is held back until it is complete and then yielded whole.
+        poll_interval (float): Seconds to wait between checks for new data
+            when following
+            
+    Yields:
+        memoryview: One line of the file
+    """
+    with open(path, 'rb') as f:
+        end = os.fstat(f.fileno()).st_size
+        if follow:
+            # A last line without newline may still be being written
+            end = _last_line_start(f, end, chunk_size)
+        yield from islice(_iter_lines_backward(f, end, chunk_size), max_lines)
+        if follow:
+            yield from _follow_lines(f, end, chunk_size, poll_interval)
+
+def benchmark_content_reversal(file_size=256 << 20):
+    """Measure content reversal throughput of each implementation.
+    
+    Args:
+        file_size (int): Size of the generated input file in bytes
+        
+    Returns:
+        dict: MB/s for the original, fast and in-place reversal
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_path = os.path.join(tmpdir, "input.bin")
+        output_path = os.path.join(tmpdir, "output.bin")
+        with open(input_path, 'wb') as f:
+            block = os.urandom(MIN_CHUNK_SIZE)
+            for _ in range(file_size // len(block)):
+                f.write(block)
+        
+        for name, reverse in (("reverse_file_content", reverse_file_content),
+                              ("reverse_file_content_fast", reverse_file_content_fast)):
+            start = time.perf_counter()
+            reverse(input_path, output_path)
+            results[name] = file_size / (1 << 20) / (time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        reverse_file_content_fast(input_path, input_path)
+        results["reverse_file_content_fast (in place)"] = file_size / (1 << 20) / (time.perf_counter() - start)
+    return results
+
 # Example usage
 if __name__ == "__main__":
     # Create a sample file
@@ -112,6 +481,23 @@ if __name__ == "__main__":
     reverse_file_by_lines("sample.txt", "reversed_lines.txt")
     print("File reversed by lines saved to 'reversed_lines.txt'")
     
+    reverse_file_by_lines_streaming("sample.txt", "reversed_lines_streaming.txt")
+    print("File reversed by lines in one pass saved to 'reversed_lines_streaming.txt'")
+    
     # Test content reversal
     reverse_file_content("sample.txt", "reversed_content.txt")
-    print("File content reversed saved to 'reversed_content.txt'")
\ No newline at end of file
+    print("File content reversed saved to 'reversed_content.txt'")
+    
+    reverse_file_content_fast("sample.txt", "reversed_content_fast.txt")
+    print("File content reversed with large buffers saved to 'reversed_content_fast.txt'")
+    
+    reverse_file_by_lines_parallel("sample.txt", "reversed_lines_parallel.txt", workers=2)
+    reverse_file_content_parallel("sample.txt", "reversed_content_parallel.txt", workers=2)
+    print("Files reversed by 2 worker processes saved to 'reversed_lines_parallel.txt' and 'reversed_content_parallel.txt'")
+    
+    # Read the last 2 lines without writing an output file
+    print("Last 2 lines:", [bytes(line) for line in iter_lines_reversed("sample.txt", max_lines=2)])
+    
+    if "--bench" in sys.argv:
+        for name, mb_per_second in benchmark_content_reversal().items():
+            print(f"{name}: {mb_per_second:.1f} MB/s")
\ No newline at end of file
@@ -0,0 +1,308 @@
+"""File Reverser Benchmark
+
+Run: python3 file_reverser_bench.py [--size MB] [--modes ...] [--shapes ...]
+                                    [--output results.json]
+                                    [--baseline baseline.json] [--tolerance 0.1]
+
+Generates deterministic input files of several shapes, runs every reversal
+mode of file_reverser on them and reports throughput (MB/s), read/write
+syscalls per MB and peak RSS as JSON. Every measurement runs in a fresh
+process, whose RSS high-water mark is reset right before the mode runs
+(on Linux), so peak RSS and syscall counts belong to that run alone.
+
+With --baseline, results are compared against a previous JSON report and
+the exit code is 1 if any mode got slower or bigger than the tolerance
+allows, so regressions in chunk handling show up before they ship.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+
+import file_reverser
+
+MB = 1 << 20
+
+# Printable bytes used for line content, newline never appears in a line
+_LINE_BYTES = bytes(range(0x21, 0x7f))
+_TO_LINE_BYTES = bytes(_LINE_BYTES[i % len(_LINE_BYTES)] for i in range(256))
+
+# shape name -> (min line length, max line length, trailing newline) or None for binary
+SHAPES = {
+    "tiny_lines": (0, 16, True),
+    "typical_lines": (20, 120, True),
+    "huge_lines": (256 << 10, 4 << 20, True),
+    "no_trailing_newline": (20, 120, False),
+    "binary": None,
+}
+
+def _content(input_path, output_path):
+    file_reverser.reverse_file_content(input_path, output_path)
+
+def _content_fast(input_path, output_path):
+    file_reverser.reverse_file_content_fast(input_path, output_path)
+
+def _content_in_place(input_path, output_path):
+    file_reverser.reverse_file_content_fast(output_path, output_path)
+
+def _content_parallel(input_path, output_path):
+    file_reverser.reverse_file_content_parallel(input_path, output_path)
+
+def _by_lines(input_path, output_path):
+    file_reverser.reverse_file_by_lines(input_path, output_path)
+
+def _by_lines_streaming(input_path, output_path):
+    file_reverser.reverse_file_by_lines_streaming(input_path, output_path)
+
+def _by_lines_parallel(input_path, output_path):
+    file_reverser.reverse_file_by_lines_parallel(input_path, output_path)
+
+def _iter_lines_reversed(input_path, output_path):
+    for _ in file_reverser.iter_lines_reversed(input_path):
+        pass
+
+# mode name -> (function, does the real I/O in worker processes)
+MODES = {
+    "content": (_content, False),
+    "content_fast": (_content_fast, False),
+    "content_in_place": (_content_in_place, False),
+    "content_parallel": (_content_parallel, True),
+    "by_lines": (_by_lines, False),
+    "by_lines_streaming": (_by_lines_streaming, False),
+    "by_lines_parallel": (_by_lines_parallel, True),
+    "iter_lines_reversed": (_iter_lines_reversed, False),
+}
+
+def generate_file(path, shape, size, seed=0):
+    """Write a deterministic file of the given shape and size.
+
+    A pseudo-random pattern of a little over 1 MiB is generated once and
+    repeated, so big files are cheap to create. The odd pattern length
+    keeps line boundaries from lining up with power of two chunk sizes.
+
+    Args:
+        path (str): Where to write the file
+        shape (str): One of SHAPES
+        size (int): File size in bytes
+        seed (int): Seed of the pattern
+    """
+    rng = random.Random(f"{shape}:{seed}")
+    spec = SHAPES[shape]
+    if spec is None:
+        pattern = rng.randbytes(MB + 7)
+    else:
+        min_len, max_len, _ = spec
+        lines = []
+        total = 0
+        while total < MB + 7 or not lines:
+            line = rng.randbytes(rng.randint(min_len, max_len)).translate(_TO_LINE_BYTES) + b'\n'
+            lines.append(line)
+            total += len(line)
+        pattern = b''.join(lines)
+
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            piece = pattern[:size - written]
+            f.write(piece)
+            written += len(piece)
+        if spec is not None and size:
+            # The pattern is cut at an arbitrary byte, fix up the last one
+            f.seek(size - 1)
+            f.write(b'\n' if spec[2] else b'x')
+
+def _read_proc_io():
+    """Number of read and write syscalls made by this process, None off Linux."""
+    try:
+        with open("/proc/self/io") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+    except OSError:
+        return None
+    return int(counters["syscr"]) + int(counters["syscw"])
+
+def _reset_peak_rss():
+    """Reset this process's RSS high-water mark, False if the OS can't.
+
+    ru_maxrss survives fork and exec, so even a spawned child starts with
+    its parent's peak; on Linux writing 5 to clear_refs resets VmHWM.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+def _read_peak_rss():
+    """VmHWM of this process in KiB, None off Linux."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _measure(mode, input_path, output_path, conn):
+    """Run one mode in this (fresh) process and send back its measurements.
+
+    Sends ("ok", (seconds, syscalls, peak RSS in KiB)) or ("error", traceback).
+    """
+    try:
+        function, uses_workers = MODES[mode]
+        if mode == "content_in_place":
+            shutil.copyfile(input_path, output_path)
+
+        peak_reset = _reset_peak_rss()
+        syscalls_before = _read_proc_io()
+        start = time.perf_counter()
+        function(input_path, output_path)
+        elapsed = time.perf_counter() - start
+        syscalls_after = _read_proc_io()
+
+        peak_rss = _read_peak_rss() if peak_reset else None
+        if peak_rss is None:
+            # Includes whatever the process inherited, an upper bound only
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform == "darwin":
+                peak_rss //= 1024  # bytes on macOS, KiB elsewhere
+        if uses_workers:
+            # Workers are forked after the reset, so their peak starts at ours
+            children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+            if sys.platform == "darwin":
+                children_rss //= 1024
+            peak_rss = max(peak_rss, children_rss)
+
+        syscalls = None
+        if syscalls_before is not None and not uses_workers:
+            # Workers' syscalls happen in other processes and can't be counted here
+            syscalls = syscalls_after - syscalls_before
+        conn.send(("ok", (elapsed, syscalls, peak_rss)))
+    except BaseException:
+        conn.send(("error", traceback.format_exc()))
+        raise
+    finally:
+        conn.close()
+
+def run_benchmark(size=16 * MB, shapes=None, modes=None, seed=0):
+    """Benchmark every mode on every shape.
+
+    Args:
+        size (int): Size of each generated input file in bytes
+        shapes (list): Shape names to run, all of SHAPES when None
+        modes (list): Mode names to run, all of MODES when None
+        seed (int): Seed for the generated files
+
+    Returns:
+        dict: JSON-serializable report
+    """
+    # Spawned (not forked) children don't share the parent's pages
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for shape in shapes or SHAPES:
+            input_path = os.path.join(tmpdir, f"{shape}.in")
+            generate_file(input_path, shape, size, seed)
+            for mode in modes or MODES:
+                output_path = os.path.join(tmpdir, f"{shape}.{mode}.out")
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=_measure, args=(mode, input_path, output_path, sender))
+                process.start()
+                sender.close()
+                try:
+                    status, payload = receiver.recv()
+                except EOFError:
+                    status, payload = "error", None
+                process.join()
+                if status != "ok":
+                    raise RuntimeError(f"Mode {mode} failed on {shape} (exit code {process.exitcode})"
+                                       + (f":\n{payload}" if payload else ""))
+                elapsed, syscalls, peak_rss = payload
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+
+                megabytes = size / MB
+                results.append({
+                    "shape": shape,
+                    "mode": mode,
+                    "seconds": elapsed,
+                    "mb_per_s": megabytes / elapsed if elapsed else None,
+                    "syscalls_per_mb": syscalls / megabytes if syscalls is not None and size else None,
+                    "peak_rss_kb": peak_rss,
+                })
+
+    return {
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "size": size,
+        "seed": seed,
+        "results": results,
+    }
+
+def compare_to_baseline(report, baseline, tolerance=0.1):
+    """List regressions of report against baseline.
+
+    A mode regresses if its MB/s dropped, or its syscalls per MB or peak RSS
+    grew, by more than tolerance (a fraction) on the same shape.
+
+    Returns:
+        list: Human-readable description of each regression
+    """
+    previous = {(r["shape"], r["mode"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get((result["shape"], result["mode"]))
+        if old is None:
+            continue
+        name = f'{result["mode"]} on {result["shape"]}'
+        if old["mb_per_s"] and result["mb_per_s"] is not None \
+                and result["mb_per_s"] < old["mb_per_s"] * (1 - tolerance):
+            regressions.append(f'{name}: {old["mb_per_s"]:.1f} -> {result["mb_per_s"]:.1f} MB/s')
+        for key in ("syscalls_per_mb", "peak_rss_kb"):
+            if old[key] is not None and result[key] is not None \
+                    and result[key] > old[key] * (1 + tolerance):
+                regressions.append(f'{name}: {key} {old[key]:.1f} -> {result[key]:.1f}')
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark file_reverser")
+    parser.add_argument("--size", type=int, default=16, help="input file size in MB")
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES))
+    parser.add_argument("--modes", nargs="+", choices=list(MODES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed relative slowdown before reporting a regression")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.size * MB, args.shapes, args.modes, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
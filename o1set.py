@@ -15,7 +15,13 @@ The set should be implemented using arrays of size N.
 The operations must be efficient, with all of them running in constant time.
 """
 
+from array import array
+from itertools import chain
+
 class O1Set:
+    # Number of elements iterate_and_remove() hasn't visited yet, None when not running
+    _cursor = None
+
     def __init__(self, N):
         # Initialize arrays of size N
         self.N = N
@@ -39,15 +45,34 @@ class O1Set:
             raise ValueError(f"Element {x} out of range [0, {self.N-1}]")
         
         if self.lookup(x):
-            # Get the position of x in dense array
-            pos = self.sparse[x]
-            
             # Move the last element to the position of x
-            last_elem = self.dense[self.n - 1]
-            self.dense[pos] = last_elem
-            self.sparse[last_elem] = pos
-            
-            self.n -= 1
+            self._remove_pos(self.sparse[x])
+
+    def _move(self, src, dst):
+        """Move the element at dense[src] to dense[dst]"""
+        x = self.dense[src]
+        self.dense[dst] = x
+        self.sparse[x] = dst
+
+    def _remove_pos(self, pos):
+        """Remove the element at dense[pos] by moving the last one into its place
+
+        While iterate_and_remove() runs, an element it hasn't visited yet is
+        replaced by the last unvisited element instead, whose slot is then
+        filled from the end, so visited elements never move into the
+        unvisited part.
+        """
+        self.n -= 1
+        cursor = self._cursor
+        if cursor is not None and pos < cursor:
+            cursor -= 1
+            self._cursor = cursor
+            self._move(cursor, pos)
+            pos = cursor
+        if pos != self.n:
+            # When pos is the last slot nothing has to move, and moving the
+            # element there onto itself would point sparse past the end
+            self._move(self.n, pos)
 
     def lookup(self, x):
         """Check if element x is present in the set"""
@@ -65,6 +90,392 @@ class O1Set:
         for i in range(self.n):
             yield self.dense[i]
 
+    def _checked(self, values):
+        """Return values as a sequence, after checking all of them are in range"""
+        if not isinstance(values, (list, tuple, range, array, memoryview)):
+            values = list(values)
+        elif isinstance(values, memoryview) and values.obj is self.dense:
+            values = values.tolist()  # Our own iterate() view, changes as we go
+        if len(values) and (min(values) < 0 or max(values) >= self.N):
+            bad = next(x for x in values if not 0 <= x < self.N)
+            raise ValueError(f"Element {bad} out of range [0, {self.N-1}]")
+        return values
+
+    def insert_many(self, values):
+        """Insert every element of values into the set
+
+        The range check is done for all values up front, so on error
+        nothing is inserted.
+        """
+        self._insert_all(self._checked(values))
+
+    def _insert_all(self, values):
+        """insert_many without the range check"""
+        dense, sparse, n = self.dense, self.sparse, self.n
+        for x in values:
+            pos = sparse[x]
+            if pos < n and dense[pos] == x:
+                continue
+            dense[n] = x
+            sparse[x] = n
+            n += 1
+        self.n = n
+
+    def remove_many(self, values):
+        """Remove every element of values from the set"""
+        self._remove_all(self._checked(values))
+
+    def _remove_all(self, values):
+        """remove_many without the range check"""
+        if self._cursor is not None:
+            for x in values:
+                pos = self.sparse[x]
+                if pos < self.n and self.dense[pos] == x:
+                    self._remove_pos(pos)
+            return
+        dense, sparse, n = self.dense, self.sparse, self.n
+        for x in values:
+            pos = sparse[x]
+            if pos < n and dense[pos] == x:
+                n -= 1
+                last_elem = dense[n]
+                dense[pos] = last_elem
+                sparse[last_elem] = pos
+        self.n = n
+
+    def contains_many(self, values):
+        """Check which elements of values are in the set
+
+        Returns:
+            bytearray: 1 at index i if values[i] is in the set, else 0
+        """
+        values = self._checked(values)
+        dense, sparse, n = self.dense, self.sparse, self.n
+        result = bytearray(len(values))
+        for i, x in enumerate(values):
+            pos = sparse[x]
+            if pos < n and dense[pos] == x:
+                result[i] = 1
+        return result
+
+    def iterate_and_remove(self, predicate=None):
+        """Iterate over the elements, removing those matching predicate
+
+        Walks dense from the end, keeping the elements not visited yet in
+        front. Removals (from predicate or the loop body) keep visited and
+        unvisited elements apart, so every element present throughout the
+        iteration is yielded exactly once and removed ones that weren't
+        visited yet are never yielded. Elements inserted meanwhile aren't
+        visited. Nothing is copied.
+
+        Args:
+            predicate: Called with each element, which is removed if it
+                returns True. Every element is removed when None.
+
+        Yields:
+            Every element present when the iteration reaches it
+
+        Raises:
+            RuntimeError: If another iterate_and_remove() is running on the set
+        """
+        if self._cursor is not None:
+            raise RuntimeError("iterate_and_remove() is already running on this set")
+        self._cursor = self.n
+        try:
+            while True:
+                cursor = min(self._cursor, self.n)  # clear() empties it
+                if cursor == 0:
+                    return
+                self._cursor = cursor - 1
+                x = self.dense[cursor - 1]
+                if predicate is None or predicate(x):
+                    self.remove(x)
+                yield x
+        finally:
+            self._cursor = None
+
+    def drain(self):
+        """Remove and yield every element, safe to mutate the set meanwhile
+
+        Elements inserted while draining are drained as well.
+        """
+        while self.n:
+            self.n -= 1
+            yield self.dense[self.n]
+
+    def _check_universe(self, other):
+        if not isinstance(other, O1Set):
+            raise TypeError(f"Expected an O1Set, got {type(other).__name__}")
+        if other.N != self.N:
+            raise ValueError(f"Universe mismatch: {self.N} != {other.N}")
+
+    def _contains_all(self, values):
+        """Elements of values that are in the set, without range checks"""
+        dense, sparse, n = self.dense, self.sparse, self.n
+        result = []
+        for x in values:
+            pos = sparse[x]
+            if pos < n and dense[pos] == x:
+                result.append(x)
+        return result
+
+    def _missing_all(self, values):
+        """Elements of values that aren't in the set, without range checks"""
+        dense, sparse, n = self.dense, self.sparse, self.n
+        result = []
+        for x in values:
+            pos = sparse[x]
+            if not (pos < n and dense[pos] == x):
+                result.append(x)
+        return result
+
+    def _elements(self):
+        """Copy of dense[:n]"""
+        return self.dense[:self.n]
+
+    def _rebuild(self, keep):
+        """Reduce the set to keep, a list of its own elements"""
+        self.n = 0
+        self._insert_all(keep)
+
+    def _result(self, out, elements):
+        """Fill out (cleared first) or a new set with elements"""
+        if out is None:
+            out = type(self)(self.N)
+        else:
+            self._check_universe(out)
+            out.clear()
+        out._insert_all(elements)
+        return out
+
+    def union(self, other, out=None):
+        """Set with the elements of both sets
+
+        O(|A| + |B|) when filling out, an existing set of the same universe
+        that is cleared first (it may be self or other). Without out a new
+        set is allocated, which costs O(N) time and memory.
+        """
+        self._check_universe(other)
+        return self._result(out, chain(self._elements(), self._missing_all(other._elements())))
+
+    def intersection(self, other, out=None):
+        """Set with the elements in both sets
+
+        O(min(|A|, |B|)) when filling out, see union(). Without out a new
+        set is allocated, which costs O(N) time and memory.
+        """
+        self._check_universe(other)
+        small, large = (self, other) if self.n <= other.n else (other, self)
+        return self._result(out, large._contains_all(small._elements()))
+
+    def difference(self, other, out=None):
+        """Set with the elements not in other
+
+        O(|A|) when filling out, see union(). Without out a new set is
+        allocated, which costs O(N) time and memory.
+        """
+        self._check_universe(other)
+        return self._result(out, other._missing_all(self._elements()))
+
+    # The operators allocate a new set, use the in-place forms or out= on hot paths
+    def __or__(self, other):
+        return self.union(other) if isinstance(other, O1Set) else NotImplemented
+
+    def __and__(self, other):
+        return self.intersection(other) if isinstance(other, O1Set) else NotImplemented
+
+    def __sub__(self, other):
+        return self.difference(other) if isinstance(other, O1Set) else NotImplemented
+
+    def __ior__(self, other):
+        """Add the elements of other, O(|B|)"""
+        if not isinstance(other, O1Set):
+            return NotImplemented
+        self._check_universe(other)
+        self._insert_all(other._elements())
+        return self
+
+    def __iand__(self, other):
+        """Keep only the elements also in other, O(min(|A|, |B|))"""
+        if not isinstance(other, O1Set):
+            return NotImplemented
+        self._check_universe(other)
+        self._rebuild(self._contains_all(other._elements()) if other.n < self.n
+                      else other._contains_all(self._elements()))
+        return self
+
+    def __isub__(self, other):
+        """Remove the elements of other, O(min(|A|, |B|))"""
+        if not isinstance(other, O1Set):
+            return NotImplemented
+        self._check_universe(other)
+        if other.n < self.n:
+            self._remove_all(other._elements())
+        else:
+            self._rebuild(other._missing_all(self._elements()))
+        return self
+
+class PackedO1Set(O1Set):
+    def __init__(self, N):
+        """O1Set storing dense and sparse in machine-word arrays
+
+        Uses 4 bytes per slot in each array for N up to 2**32 and 8 bytes
+        above, instead of an 8-byte pointer per slot of a list.
+        """
+        self.N = N
+        self.typecode = 'I' if N <= 1 << (8 * array('I').itemsize) else 'Q'
+        zeros = bytes(N * array(self.typecode).itemsize)
+        self.dense = array(self.typecode, zeros)  # Stores the actual elements
+        self.sparse = array(self.typecode, zeros)  # Maps elements to their positions in dense array
+        self.n = 0  # Number of elements in the set
+
+    def iterate(self):
+        """Zero-copy view of the elements in the set
+
+        The view reflects later changes to the set, copy it (e.g. with
+        list() or .tolist()) to keep a snapshot, or use drain() or
+        iterate_and_remove() to remove while iterating.
+        """
+        return memoryview(self.dense)[:self.n]
+
+class O1Map(PackedO1Set):
+    def __init__(self, N, typecode=None, track_generation=False):
+        """Map from integers in [0, N-1] to values, built on the sparse set
+
+        Values live in an array parallel to dense, so clear() is O(1) and
+        never touches memory. Old values stay referenced until their slot
+        is reused. Set operations act on the keys; new maps they return
+        hold default values.
+
+        Args:
+            N: Size of the key universe
+            typecode: array typecode for numeric values (e.g. 'Q'), values
+                can be any object when None
+            track_generation: Count clear() calls in generation. Code that
+                keeps a handle on the map across a request saves generation
+                and checks it with is_current() to see whether the map was
+                cleared and reused since. items() then fails if the map is
+                cleared under it
+        """
+        super().__init__(N)
+        if typecode is None:
+            self.values = [None] * N
+            self._default = None
+        else:
+            self.values = array(typecode, bytes(N * array(typecode).itemsize))
+            self._default = 0
+        self.generation = 0 if track_generation else None
+
+    def _check(self, key):
+        if not 0 <= key < self.N:
+            raise ValueError(f"Element {key} out of range [0, {self.N-1}]")
+
+    def get(self, key, default=None):
+        """Value of key, or default if it isn't in the map"""
+        self._check(key)
+        pos = self.sparse[key]
+        if pos < self.n and self.dense[pos] == key:
+            return self.values[pos]
+        return default
+
+    def set(self, key, value):
+        """Set the value of key, adding it if needed"""
+        self._check(key)
+        pos = self.sparse[key]
+        if pos < self.n and self.dense[pos] == key:
+            self.values[pos] = value
+            return
+        # Store the value first, a value the typecode rejects must not publish the key
+        pos = self.n
+        self.values[pos] = value
+        self.dense[pos] = key
+        self.sparse[key] = pos
+        self.n += 1
+
+    def _move(self, src, dst):
+        super()._move(src, dst)
+        self.values[dst] = self.values[src]
+
+    def _pop(self, key):
+        """Remove key without a range check, return True if it was present"""
+        pos = self.sparse[key]
+        if not (pos < self.n and self.dense[pos] == key):
+            return False
+        self._remove_pos(pos)
+        self.values[self.n] = self._default  # Don't keep the value alive
+        return True
+
+    def pop(self, key, *default):
+        """Remove key and return its value
+
+        Returns default if given and key isn't in the map, raises KeyError otherwise.
+        """
+        self._check(key)
+        pos = self.sparse[key]
+        if pos < self.n and self.dense[pos] == key:
+            value = self.values[pos]
+            self._pop(key)
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def insert(self, x):
+        """Add x with the default value, keep the value of an existing x"""
+        self._check(x)
+        self._insert_all((x,))
+
+    def remove(self, x):
+        """Remove x and its value"""
+        self._check(x)
+        self._pop(x)
+
+    def _insert_all(self, values):
+        dense, sparse = self.dense, self.sparse
+        for x in values:
+            pos = sparse[x]
+            if pos < self.n and dense[pos] == x:
+                continue
+            self.set(x, self._default)
+
+    def _remove_all(self, values):
+        for x in values:
+            self._pop(x)
+
+    def _rebuild(self, keep):
+        entries = [(x, self.values[self.sparse[x]]) for x in keep]
+        self.n = 0
+        for x, value in entries:
+            self.set(x, value)
+
+    def clear(self):
+        """Remove all entries in O(1), starting a new generation if tracked"""
+        self.n = 0
+        if self.generation is not None:
+            self.generation += 1
+
+    def is_current(self, generation):
+        """Check that the map wasn't cleared since generation was read from it
+
+        Raises:
+            RuntimeError: If the map doesn't track generations
+        """
+        if self.generation is None:
+            raise RuntimeError("O1Map was created without track_generation")
+        return generation == self.generation
+
+    def items(self):
+        """Iterate over (key, value) pairs"""
+        generation = self.generation
+        i = 0
+        while True:
+            if generation is not None and not self.is_current(generation):
+                raise RuntimeError("O1Map cleared during iteration")
+            if i >= self.n:
+                return
+            yield self.dense[i], self.values[i]
+            i += 1
+
 # Example usage
 if __name__ == "__main__":
     # Create a set that can store numbers from 0 to 9
@@ -90,4 +501,52 @@ if __name__ == "__main__":
     
     # Clear the set
     s.clear()
-    print("Elements after clearing:", list(s.iterate()))
\ No newline at end of file
+    print("Elements after clearing:", list(s.iterate()))
+
+    # Compact set with bulk operations
+    packed = PackedO1Set(1 << 20)
+    packed.insert_many(array('I', [42, 7, 100000, 7]))
+    packed.remove_many([42])
+    print("Packed elements:", packed.iterate().tolist())
+    print("Contains 7, 42:", list(packed.contains_many([7, 42])))
+
+    # Set algebra between sets of the same universe
+    a, b = PackedO1Set(10), PackedO1Set(10)
+    a.insert_many([1, 2, 3, 4])
+    b.insert_many([3, 4, 5])
+    print("a & b:", sorted((a & b).iterate()), "a - b:", sorted((a - b).iterate()))
+    print("Drained:", sorted(a.drain()), "left:", a.n)
+
+    # Removing elements not visited yet while iterating
+    a.insert_many([0, 1, 2, 3])
+    seen = []
+    for x in a.iterate_and_remove(lambda x: False):
+        seen.append(x)
+        if x == 3:
+            a.remove(0)
+    assert sorted(seen) == [1, 2, 3], seen
+    print("Seen while removing 0:", seen)
+    
+    # Removing the only unvisited element left behind the cursor
+    a.clear()
+    a.insert_many([0, 1, 2])
+    seen = []
+    for x in a.iterate_and_remove():
+        seen.append(x)
+        if x == 2:
+            a.remove(0)
+    assert sorted(seen) == [1, 2] and a.n == 0, seen
+    a.insert_many([0, 1, 2])
+    for x in a.iterate_and_remove(lambda x: False):
+        if x == 2:
+            a.remove(0)
+    assert a.lookup(1) and sorted(a.iterate().tolist()) == [1, 2]
+
+    # Scratch table reused across requests without reallocating
+    table = O1Map(1 << 20, track_generation=True)
+    request = table.generation
+    table.set(123456, "dirty")
+    table.set(42, "clean")
+    print("Entries:", sorted(table.items()), "pop 42:", table.pop(42))
+    table.clear()
+    print("After clear:", list(table.items()), "still current:", table.is_current(request))
\ No newline at end of file
@@ -1,22 +1,85 @@
-from threading import Lock, Thread, Condition
-from queue import Queue
-from typing import List
+from threading import Lock, Thread, Condition, local
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import os
+import sys
 import time
 
+class _IdRange:
+    """Lease state of one sequence, shared by the threaded generators
+    
+    IDs are leased from last_id up to reserved with a single counter bump;
+    both are guarded by the owning generator's lock. Extensions of the
+    reservation are serialized per range, so the reserved mark only moves
+    forward and extending one range never waits on another.
+    """
+    __slots__ = ("last_id", "reserved", "reserve_lock")
+    
+    def __init__(self, high_water: int = 0):
+        self.last_id = high_water  # Highest ID leased so far
+        # Highest ID that may be leased, last_id...reserved is the buffer
+        self.reserved = high_water
+        self.reserve_lock = Lock()
+    
+    def lease(self, n: int) -> Optional[int]:
+        """Lease n consecutive IDs, caller holds the owner's lock
+        
+        Returns:
+            First leased ID, None if fewer than n are reserved
+        """
+        if self.last_id + n > self.reserved:
+            return None
+        start = self.last_id + 1
+        self.last_id += n
+        return start
+    
+    def extend(self, lock: Lock, needed: int, target: int,
+               reserve: Optional[Callable[[int], None]] = None) -> bool:
+        """Extend the reservation so IDs up to needed can be leased
+        
+        Args:
+            lock: Owner's lock guarding last_id and reserved, not held by the caller
+            needed: Highest ID that must be leasable afterwards
+            target: High-water mark to reserve up to if an extension is needed
+            reserve: Called with the new high-water mark, without lock held,
+                before any ID up to it can be leased (e.g. to make it durable)
+            
+        Returns:
+            bool: True if the reservation was extended
+        """
+        with self.reserve_lock:
+            with lock:
+                if self.reserved >= needed:
+                    return False
+                target = max(target, self.reserved)
+            if reserve is not None:
+                reserve(target)
+            with lock:
+                self.reserved = max(self.reserved, target)
+            return True
+
 class UniqueIdGenerator:
-    def __init__(self, buffer_size: int = 1000, refill_threshold: float = 0.2):
+    def __init__(self, buffer_size: int = 1000, refill_threshold: float = 0.2,
+                 local_block_size: int = 64):
         """Initialize the ID generator with a buffer
         
+        IDs are handed out as contiguous (start, count) leases taken from a
+        reserved range with a single counter bump. The buffer is the part of
+        the reserved range that hasn't been leased yet; a background thread
+        extends the reservation when it falls below the threshold.
+        
         Args:
             buffer_size: Maximum number of IDs to store in buffer
             refill_threshold: When buffer is below this percentage, trigger refill
+            local_block_size: Number of IDs each thread caches for getOneId
         """
-        self.buffer = Queue(maxsize=buffer_size)
         self.buffer_size = buffer_size
         self.refill_threshold = refill_threshold
-        self.last_id = 0
+        self.local_block_size = local_block_size
+        self._range = _IdRange(self._load_high_water())
         self.lock = Lock()
         self.condition = Condition(self.lock)
+        self._local = local()
         self.refill_thread = None
         self.running = True
         self._start_refill_thread()
@@ -26,35 +89,234 @@ class UniqueIdGenerator:
         self.refill_thread = Thread(target=self._refill_buffer, daemon=True)
         self.refill_thread.start()
     
+    @property
+    def last_id(self) -> int:
+        """Highest ID leased so far"""
+        return self._range.last_id
+    
+    def _buffer_low(self) -> bool:
+        """Check if the unleased part of the reservation is below the threshold"""
+        return self._range.reserved - self._range.last_id <= self.refill_threshold * self.buffer_size
+    
     def _refill_buffer(self):
         """Background thread function to refill buffer when needed"""
         while self.running:
             with self.lock:
                 # Wait if buffer is sufficiently full
-                while (self.buffer.qsize() / self.buffer_size) > self.refill_threshold and self.running:
+                while not self._buffer_low() and self.running:
                     self.condition.wait(timeout=1.0)
-                
-                # Generate new batch of IDs if buffer is below threshold
-                if self.running and not self.buffer.full():
-                    new_ids = self._generate_batch(self.buffer_size - self.buffer.qsize())
-                    for id in new_ids:
-                        if not self.buffer.full():
-                            self.buffer.put(id)
-                    self.condition.notify_all()
+                if not self.running:
+                    break
+                target = self._range.last_id + self.buffer_size
+            self._generate_batch(target, target)
+    
+    def _load_high_water(self) -> int:
+        """Return the ID after which a fresh generator starts handing out IDs"""
+        return 0
+    
+    def _reserve(self, high_water: int) -> None:
+        """Make every ID up to high_water available for leasing
+        
+        Called without self.lock held. Nothing needs to happen for an
+        in-memory generator; subclasses can make the reservation durable.
+        
+        Args:
+            high_water: New highest ID that may be leased
+        """
     
-    def _generate_batch(self, n: int) -> List[int]:
-        """Generate n new unique IDs
+    def _generate_batch(self, needed: int, target: int) -> None:
+        """Extend the reservation so IDs up to needed can be leased
         
         Args:
-            n: Number of IDs to generate
+            needed: Highest ID that must be leasable afterwards
+            target: High-water mark to reserve up to if an extension is needed
+        """
+        if self._range.extend(self.lock, needed, target, self._reserve):
+            with self.lock:
+                self.condition.notify_all()
+    
+    def getIdRange(self, n: int) -> Tuple[int, int]:
+        """Lease n consecutive unique IDs
+        
+        Args:
+            n: Number of IDs to lease
+            
+        Returns:
+            Tuple (start, n), the IDs are start to start+n-1
+        """
+        if n <= 0:
+            raise ValueError("Number of IDs requested must be positive")
+        
+        while True:
+            with self.lock:
+                if not self.running:
+                    raise RuntimeError("ID Generator is stopped")
+                start = self._range.lease(n)
+                if start is not None:
+                    if self._buffer_low():
+                        self.condition.notify_all()  # Notify refill thread
+                    return start, n
+                needed = self._range.last_id + n
+            # Not enough IDs buffered, reserve them here instead of waiting
+            self._generate_batch(needed, needed + self.buffer_size)
+    
+    def getIds(self, n: int) -> List[int]:
+        """Get n unique IDs
+        
+        Args:
+            n: Number of IDs to get
             
         Returns:
             List of n unique IDs
         """
+        start, count = self.getIdRange(n)
+        return list(range(start, start + count))
+    
+    def getOneId(self) -> int:
+        """Get one unique ID
+        
+        Served from a block cached per thread, so most calls take no shared
+        lock. IDs from one thread increase, but IDs from different threads
+        interleave in no particular order.
+        
+        Returns:
+            A unique ID
+        """
+        if not self.running:
+            raise RuntimeError("ID Generator is stopped")
+        cache = self._local
+        next_id = getattr(cache, "next_id", 0)
+        if next_id >= getattr(cache, "end", 0):
+            next_id, count = self.getIdRange(self.local_block_size)
+            cache.end = next_id + count
+        cache.next_id = next_id + 1
+        return next_id
+    
+    def stop(self):
+        """Stop the ID generator and its refill thread"""
+        self.running = False
         with self.lock:
-            start_id = self.last_id + 1
-            self.last_id += n
-            return list(range(start_id, start_id + n))
+            self.condition.notify_all()
+        if self.refill_thread:
+            self.refill_thread.join()
+
+class PersistentUniqueIdGenerator(UniqueIdGenerator):
+    def __init__(self, path: str, buffer_size: int = 100000, refill_threshold: float = 0.2,
+                 local_block_size: int = 64):
+        """Initialize an ID generator whose IDs stay unique across restarts
+        
+        Every reservation of buffer_size IDs first writes its new high-water
+        mark to path (temporary file, fsync, atomic rename, fsync of the
+        directory), so there is one durable write per block rather than per
+        ID. A restarted generator resumes after the last reserved block; IDs
+        reserved but never handed out before a crash are skipped. Blocks are
+        reserved by the background refill thread before the buffer runs dry,
+        so getIds doesn't wait on fsync in steady state.
+        
+        Args:
+            path: File holding the durable high-water mark
+            buffer_size: Number of IDs reserved per durable write
+            refill_threshold: When buffer is below this percentage, trigger refill
+            local_block_size: Number of IDs each thread caches for getOneId
+        """
+        self.path = path
+        super().__init__(buffer_size, refill_threshold, local_block_size)
+    
+    def _load_high_water(self) -> int:
+        """Read the last reserved high-water mark, 0 if there is none yet"""
+        try:
+            with open(self.path) as f:
+                content = f.read()
+        except FileNotFoundError:
+            return 0
+        try:
+            return int(content)
+        except ValueError:
+            raise ValueError(f"Corrupt high-water mark file {self.path}: {content!r}") from None
+    
+    def _reserve(self, high_water: int) -> None:
+        """Durably record high_water before any ID up to it is leased
+        
+        Args:
+            high_water: New highest ID that may be leased
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(f"{high_water}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if hasattr(os, "O_DIRECTORY"):
+            # Make the rename itself durable
+            dir_fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+class SnowflakeIdGenerator:
+    def __init__(self, node_id: int, node_bits: int = 10, sequence_bits: int = 12,
+                 epoch_ms: int = 1577836800000, max_drift_ms: int = 1000,
+                 max_wait_ms: int = 5000):
+        """Initialize a coordination-free 64-bit ID generator
+        
+        IDs are composed of a millisecond timestamp since epoch_ms, the node
+        ID and a per-millisecond sequence number, from high to low bits:
+        
+            | timestamp (63 - node_bits - sequence_bits) | node | sequence |
+        
+        so every process with its own node_id generates unique, roughly
+        time-ordered IDs without talking to anyone.
+        
+        If the clock goes backwards, or a millisecond runs out of sequence
+        numbers, the generator keeps counting on its own last timestamp
+        (borrowing future milliseconds) instead of failing. Once it would run
+        more than max_drift_ms ahead of the clock, callers wait (without
+        holding the lock) for the clock to catch up, for at most
+        max_wait_ms; a clock step-back too large for that raises instead of
+        stalling ID generation until the clock catches up.
+        
+        Args:
+            node_id: ID of this node/worker, unique among all generators
+            node_bits: Number of bits for the node ID
+            sequence_bits: Number of bits for the per-millisecond sequence
+            epoch_ms: Start of the timestamp, in milliseconds since the Unix epoch
+            max_drift_ms: How far ahead of the clock the timestamp may run
+            max_wait_ms: How long a call may wait for the clock to catch up
+                before raising RuntimeError
+        """
+        if not 0 <= node_id < (1 << node_bits):
+            raise ValueError(f"Node ID must be in [0, {(1 << node_bits) - 1}]")
+        self.node_id = node_id
+        self.sequence_bits = sequence_bits
+        self.timestamp_shift = node_bits + sequence_bits
+        self.max_sequence = (1 << sequence_bits) - 1
+        self.max_timestamp = (1 << (63 - self.timestamp_shift)) - 1
+        self.epoch_ms = epoch_ms
+        self.max_drift_ms = max_drift_ms
+        self.max_wait_ms = max_wait_ms
+        self.last_timestamp = -1
+        self.sequence = self.max_sequence  # Next call starts a new millisecond
+        self.running = True
+        self.lock = Lock()
+    
+    def _now_ms(self) -> int:
+        """Milliseconds since epoch_ms"""
+        return time.time_ns() // 1000000 - self.epoch_ms
+    
+    def _next_timestamp(self) -> Optional[int]:
+        """Move to a fresh millisecond, caller holds self.lock
+        
+        Returns:
+            Timestamp to use, never below the last one handed out, or None
+            if it would be more than max_drift_ms ahead of the clock
+        """
+        timestamp = max(self._now_ms(), self.last_timestamp + 1)
+        if timestamp - self._now_ms() > self.max_drift_ms:
+            return None
+        if timestamp > self.max_timestamp:
+            raise RuntimeError("Timestamp bits exhausted, move epoch_ms forward")
+        return timestamp
     
     def getIds(self, n: int) -> List[int]:
         """Get n unique IDs
@@ -63,35 +325,238 @@ class UniqueIdGenerator:
             n: Number of IDs to get
             
         Returns:
-            List of n unique IDs
+            List of n unique IDs in increasing order
         """
         if n <= 0:
             raise ValueError("Number of IDs requested must be positive")
+        if not self.running:
+            raise RuntimeError("ID Generator is stopped")
         
         result = []
+        deadline = None
+        while True:
+            with self.lock:
+                now = self._now_ms()
+                if now > self.last_timestamp:
+                    self.last_timestamp = now
+                    self.sequence = -1
+                while len(result) < n:
+                    if self.sequence == self.max_sequence:
+                        timestamp = self._next_timestamp()
+                        if timestamp is None:
+                            break
+                        self.last_timestamp = timestamp
+                        self.sequence = -1
+                    # IDs within one millisecond are consecutive integers
+                    count = min(n - len(result), self.max_sequence - self.sequence)
+                    base = (self.last_timestamp << self.timestamp_shift) | (self.node_id << self.sequence_bits)
+                    result.extend(range(base + self.sequence + 1, base + self.sequence + 1 + count))
+                    self.sequence += count
+                else:
+                    return result
+                # Too far ahead of the clock, wait for it outside the lock
+                behind = self.last_timestamp + 1 - self._now_ms() - self.max_drift_ms
+            
+            if deadline is None:
+                if behind > self.max_wait_ms:
+                    raise RuntimeError(f"Clock is {behind} ms behind the allowed drift, "
+                                       f"more than max_wait_ms ({self.max_wait_ms} ms)")
+                deadline = time.monotonic() + self.max_wait_ms / 1000
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"Clock didn't catch up within max_wait_ms ({self.max_wait_ms} ms)")
+            # Bounded steps, so a clock that jumps forward again is noticed soon
+            time.sleep(min(behind / 1000, remaining, 0.1))
+    
+    def getOneId(self) -> int:
+        """Get one unique ID
+        
+        Returns:
+            A unique ID
+        """
+        return self.getIds(1)[0]
+    
+    def parseId(self, id: int) -> Tuple[int, int, int]:
+        """Split an ID into its parts
+        
+        Args:
+            id: ID generated by a generator with the same layout
+            
+        Returns:
+            Tuple of (unix timestamp in ms, node ID, sequence)
+        """
+        return ((id >> self.timestamp_shift) + self.epoch_ms,
+                (id >> self.sequence_bits) & ((1 << (self.timestamp_shift - self.sequence_bits)) - 1),
+                id & self.max_sequence)
+    
+    def stop(self):
+        """Stop the ID generator, there is no thread to clean up"""
+        self.running = False
+
+class _Namespace(_IdRange):
+    """Lease and refill state of one named sequence"""
+    __slots__ = ("buffer_size", "leased", "window_start", "last_used")
+    
+    def __init__(self, buffer_size: int, now: float):
+        super().__init__()
+        self.buffer_size = buffer_size
+        self.leased = 0  # IDs leased since window_start
+        self.window_start = now
+        self.last_used = now
+
+class NamespacedIdGenerator:
+    def __init__(self, min_buffer_size: int = 64, max_buffer_size: int = 100000,
+                 refill_threshold: float = 0.2, refill_horizon: float = 1.0,
+                 idle_timeout: float = 30.0):
+        """Initialize an ID generator serving any number of named sequences
+        
+        Every namespace (e.g. "volume", "snapshot") has its own monotonic
+        sequence starting at 1, created on first use. A single background
+        thread refills whichever namespaces fall below their threshold, and
+        each namespace's buffer is sized to about refill_horizon seconds of
+        its observed consumption. A namespace unused for idle_timeout
+        seconds gives its buffer back, so idle namespaces hold no IDs.
+        
+        Args:
+            min_buffer_size: Smallest buffer of a namespace
+            max_buffer_size: Largest buffer of a namespace
+            refill_threshold: When a buffer is below this percentage, trigger refill
+            refill_horizon: Seconds of consumption a buffer should cover
+            idle_timeout: Seconds without use after which a buffer is dropped
+        """
+        self.min_buffer_size = min_buffer_size
+        self.max_buffer_size = max_buffer_size
+        self.refill_threshold = refill_threshold
+        self.refill_horizon = refill_horizon
+        self.idle_timeout = idle_timeout
+        self._namespaces = {}
+        self._pending = set()  # Namespaces waiting for the refill thread
+        self.lock = Lock()
+        self.condition = Condition(self.lock)
+        self.refill_thread = None
+        self.running = True
+        self._start_refill_thread()
+    
+    def _start_refill_thread(self):
+        """Start the background thread shared by all namespaces"""
+        self.refill_thread = Thread(target=self._refill_buffers, daemon=True)
+        self.refill_thread.start()
+    
+    def _drop_idle_buffers(self, now: float) -> None:
+        """Give back the buffers of namespaces unused for idle_timeout, caller holds self.lock"""
+        for namespace in self._namespaces.values():
+            if namespace.reserved > namespace.last_id and now - namespace.last_used > self.idle_timeout:
+                # Never handed out, so the next lease can reuse these IDs
+                namespace.reserved = namespace.last_id
+                namespace.buffer_size = self.min_buffer_size
+    
+    def _refill_buffers(self):
+        """Background thread function to refill every namespace that runs low"""
+        next_sweep = time.monotonic() + self.idle_timeout
+        while self.running:
+            with self.lock:
+                while not self._pending and self.running:
+                    self.condition.wait(timeout=min(1.0, self.idle_timeout))
+                    if time.monotonic() >= next_sweep:
+                        break
+                now = time.monotonic()
+                if now >= next_sweep:
+                    self._drop_idle_buffers(now)
+                    next_sweep = now + self.idle_timeout
+                names = list(self._pending)
+                self._pending.clear()
+            
+            for name in names:
+                if not self.running:
+                    break
+                self._refill(name)
+    
+    def _refill(self, name: str) -> None:
+        """Resize a namespace's buffer to its consumption rate and top it up"""
+        with self.lock:
+            namespace = self._namespaces[name]
+            now = time.monotonic()
+            elapsed = now - namespace.window_start
+            if elapsed > 0:
+                wanted = int(namespace.leased / elapsed * self.refill_horizon)
+                # Average with the old size to smooth out bursts
+                namespace.buffer_size = max(self.min_buffer_size, min(self.max_buffer_size,
+                                            (namespace.buffer_size + wanted) // 2))
+            namespace.leased = 0
+            namespace.window_start = now
+            target = namespace.last_id + namespace.buffer_size
+        self._generate_batch(name, target, target)
+    
+    def _generate_batch(self, name: str, needed: int, target: int) -> None:
+        """Extend a namespace's reservation so IDs up to needed can be leased
+        
+        Args:
+            name: Namespace to extend
+            needed: Highest ID that must be leasable afterwards
+            target: High-water mark to reserve up to if an extension is needed
+        """
         with self.lock:
-            while len(result) < n:
-                # If buffer is empty, wait for refill
-                while self.buffer.empty() and self.running:
-                    self.condition.notify()  # Notify refill thread
-                    self.condition.wait()
-                
-                # Get as many IDs as possible from buffer
-                while len(result) < n and not self.buffer.empty():
-                    result.append(self.buffer.get())
-                
+            namespace = self._namespaces[name]
+        namespace.extend(self.lock, needed, target)
+    
+    def getIdRange(self, name: str, n: int) -> Tuple[int, int]:
+        """Lease n consecutive unique IDs of a namespace
+        
+        Args:
+            name: Namespace of the IDs
+            n: Number of IDs to lease
+            
+        Returns:
+            Tuple (start, n), the IDs are start to start+n-1
+        """
+        if n <= 0:
+            raise ValueError("Number of IDs requested must be positive")
+        
+        while True:
+            with self.lock:
                 if not self.running:
                     raise RuntimeError("ID Generator is stopped")
+                now = time.monotonic()
+                namespace = self._namespaces.get(name)
+                if namespace is None:
+                    namespace = self._namespaces[name] = _Namespace(self.min_buffer_size, now)
+                namespace.last_used = now
+                start = namespace.lease(n)
+                if start is not None:
+                    namespace.leased += n
+                    if namespace.reserved - namespace.last_id <= self.refill_threshold * namespace.buffer_size \
+                            and name not in self._pending:
+                        self._pending.add(name)
+                        self.condition.notify()  # Notify refill thread
+                    return start, n
+                needed = namespace.last_id + n
+                buffer_size = namespace.buffer_size
+            # Not enough IDs buffered, reserve them here instead of waiting
+            self._generate_batch(name, needed, needed + buffer_size)
+    
+    def getIds(self, name: str, n: int) -> List[int]:
+        """Get n unique IDs of a namespace
         
-        return result
+        Args:
+            name: Namespace of the IDs
+            n: Number of IDs to get
+            
+        Returns:
+            List of n unique IDs
+        """
+        start, count = self.getIdRange(name, n)
+        return list(range(start, start + count))
     
-    def getOneId(self) -> int:
-        """Get one unique ID
+    def getOneId(self, name: str) -> int:
+        """Get one unique ID of a namespace
         
+        Args:
+            name: Namespace of the ID
+            
         Returns:
             A unique ID
         """
-        return self.getIds(1)[0]
+        return self.getIdRange(name, 1)[0]
     
     def stop(self):
         """Stop the ID generator and its refill thread"""
@@ -101,6 +566,186 @@ class UniqueIdGenerator:
         if self.refill_thread:
             self.refill_thread.join()
 
+class AsyncUniqueIdGenerator:
+    def __init__(self, buffer_size: int = 1000, refill_threshold: float = 0.2):
+        """Initialize an asyncio-native ID generator with a buffer
+        
+        Works like UniqueIdGenerator, but never blocks the event loop and
+        needs no thread: IDs are leased from a reserved range in plain code
+        between awaits, and the reservation is extended by an asyncio task
+        that is started as soon as the buffer drops below refill_threshold.
+        All callers that find the buffer empty await that same task rather
+        than each starting a refill of their own.
+        
+        Args:
+            buffer_size: Maximum number of IDs to store in buffer
+            refill_threshold: When buffer is below this percentage, trigger refill
+        """
+        self.buffer_size = buffer_size
+        self.refill_threshold = refill_threshold
+        self.last_id = 0  # Highest ID leased so far
+        self._reserved = 0  # Highest ID that may be leased
+        self._waiting_ids = 0  # IDs requested by callers waiting for a refill
+        self._refill_task: Optional[asyncio.Task] = None
+        self.running = True
+    
+    async def _reserve(self, high_water: int) -> None:
+        """Make every ID up to high_water available for leasing
+        
+        Nothing needs to happen for an in-memory generator; subclasses can
+        make the reservation durable, e.g. with loop.run_in_executor.
+        
+        Args:
+            high_water: New highest ID that may be leased
+        """
+    
+    async def _refill_buffer(self) -> None:
+        """Extend the reservation to cover the buffer and every waiting caller"""
+        target = self.last_id + self._waiting_ids + self.buffer_size
+        await self._reserve(target)
+        self._reserved = max(self._reserved, target)
+    
+    def _start_refill(self) -> asyncio.Task:
+        """Start a refill task unless one is already running"""
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.get_running_loop().create_task(self._refill_buffer())
+        return self._refill_task
+    
+    async def get_id_range(self, n: int) -> Tuple[int, int]:
+        """Lease n consecutive unique IDs
+        
+        Args:
+            n: Number of IDs to lease
+            
+        Returns:
+            Tuple (start, n), the IDs are start to start+n-1
+        """
+        if n <= 0:
+            raise ValueError("Number of IDs requested must be positive")
+        
+        while True:
+            if not self.running:
+                raise RuntimeError("ID Generator is stopped")
+            if self.last_id + n <= self._reserved:
+                start = self.last_id + 1
+                self.last_id += n
+                if self._reserved - self.last_id <= self.refill_threshold * self.buffer_size:
+                    self._start_refill()  # Prefetch the next block
+                return start, n
+            
+            self._waiting_ids += n
+            try:
+                # Shield the shared task so one cancelled caller doesn't cancel it for all
+                await asyncio.shield(self._start_refill())
+            finally:
+                self._waiting_ids -= n
+    
+    async def get_ids(self, n: int) -> List[int]:
+        """Get n unique IDs
+        
+        Args:
+            n: Number of IDs to get
+            
+        Returns:
+            List of n unique IDs
+        """
+        start, count = await self.get_id_range(n)
+        return list(range(start, start + count))
+    
+    async def get_one_id(self) -> int:
+        """Get one unique ID
+        
+        Returns:
+            A unique ID
+        """
+        start, _ = await self.get_id_range(1)
+        return start
+    
+    async def stop(self):
+        """Stop the ID generator and cancel a running refill"""
+        self.running = False
+        if self._refill_task is not None and not self._refill_task.done():
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+
+def benchmark(threads: int = 8, ids_per_thread: int = 500000, batch: int = 10000) -> Tuple[float, float]:
+    """Measure ID throughput across threads
+    
+    Args:
+        threads: Number of consumer threads
+        ids_per_thread: Number of IDs each thread takes
+        batch: Size of each getIds call in the batched run
+        
+    Returns:
+        Tuple of (getOneId, getIds) IDs per second over all threads
+    """
+    def run(consume) -> float:
+        id_gen = UniqueIdGenerator()
+        workers = [Thread(target=consume, args=(id_gen,)) for _ in range(threads)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+        id_gen.stop()
+        return threads * ids_per_thread / elapsed
+    
+    def one_at_a_time(id_gen):
+        get_one = id_gen.getOneId
+        for _ in range(ids_per_thread):
+            get_one()
+    
+    def batched(id_gen):
+        for _ in range(ids_per_thread // batch):
+            id_gen.getIds(batch)
+    
+    return run(one_at_a_time), run(batched)
+
+async def benchmark_async(tasks: int = 10000, calls_per_task: int = 10, n: int = 10,
+                          buffer_size: int = 400000, reserve_delay: float = 0.001) -> dict:
+    """Measure get_ids latency with many concurrent tasks
+    
+    Args:
+        tasks: Number of concurrent tasks
+        calls_per_task: Number of get_ids calls each task makes
+        n: Number of IDs per call
+        buffer_size: Buffer size of the generator
+        reserve_delay: Simulated latency of each reservation in seconds
+        
+    Returns:
+        Dict of p50/p99/max latency in microseconds and IDs per second
+    """
+    class SlowReserveGenerator(AsyncUniqueIdGenerator):
+        async def _reserve(self, high_water: int) -> None:
+            await asyncio.sleep(reserve_delay)
+    
+    id_gen = SlowReserveGenerator(buffer_size=buffer_size)
+    latencies = []
+    
+    async def consumer():
+        for _ in range(calls_per_task):
+            start = time.perf_counter()
+            await id_gen.get_ids(n)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(consumer() for _ in range(tasks)))
+    elapsed = time.perf_counter() - start
+    await id_gen.stop()
+    
+    latencies.sort()
+    return {
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "max_us": latencies[-1] * 1e6,
+        "ids_per_second": tasks * calls_per_task * n / elapsed,
+    }
+
 # Example usage
 if __name__ == "__main__":
     # Create ID generator with buffer size 1000 and refill threshold 20%
@@ -129,4 +774,26 @@ if __name__ == "__main__":
             
     finally:
         # Clean up
-        id_gen.stop()
\ No newline at end of file
+        id_gen.stop()
+    
+    # IDs unique across processes without coordination
+    snowflake = SnowflakeIdGenerator(node_id=7)
+    snowflake_id = snowflake.getOneId()
+    print(f"Snowflake ID: {snowflake_id} (timestamp, node, sequence) = {snowflake.parseId(snowflake_id)}")
+    
+    # Separate sequences per entity type from one generator
+    namespaced = NamespacedIdGenerator()
+    print(f"Volume IDs: {namespaced.getIds('volume', 3)}, snapshot ID: {namespaced.getOneId('snapshot')}")
+    namespaced.stop()
+    
+    # Same from a coroutine, without blocking the event loop
+    async def async_demo():
+        async_gen = AsyncUniqueIdGenerator()
+        print(f"Async IDs: {await async_gen.get_ids(3)}")
+        await async_gen.stop()
+    asyncio.run(async_demo())
+    
+    if "--bench" in sys.argv:
+        one_per_second, batched_per_second = benchmark()
+        print(f"getOneId: {one_per_second / 1e6:.2f}M IDs/s, getIds: {batched_per_second / 1e6:.2f}M IDs/s")
+        print("asyncio get_ids with 10k tasks:", asyncio.run(benchmark_async()))
\ No newline at end of file